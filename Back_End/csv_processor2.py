@@ -1,17 +1,77 @@
 import pandas as pd
 import chardet
 import io
+import csv
+import itertools
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.colors import LogNorm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.cbook import boxplot_stats
+from pandas.tseries.api import guess_datetime_format
 import seaborn as sns
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.utils import ImageReader
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from PIL import Image
+import multiprocessing
+import threading
 import os
+import json
+import tempfile
+import time
+from Back_End import profiler
+from Back_End import report_cache
+from Back_End import pdf_stream
+from Back_End import report_planner
+
+try:
+    from svglib.svglib import svg2rlg
+    from reportlab.graphics import renderPDF
+    HAS_SVGLIB = True
+except ImportError:
+    HAS_SVGLIB = False
 
 pd.options.mode.copy_on_write = True
 
+MAX_RENDER_WORKERS = 8
+RENDER_LOOKAHEAD_PER_WORKER = 2  # charts queued per render worker ahead of the section being drawn
+RENDER_POOL_MIN_JOBS = 12        # reports with fewer charts render in-process: handing them off costs more
+REPORT_SPOOL_BYTES = 32 * 1024 * 1024  # the finished report moves to a temp file past this size
+HISTOGRAM_BINS = 30
+KDE_SAMPLE_SIZE = 5000  # KDE is fitted on at most this many values
+KDE_GRID_POINTS = 200
+REGPLOT_MAX_ROWS = 5000         # below this, pair plots keep seaborn's regplot with CI
+PAIR_SAMPLE_POINTS = 5000       # points drawn in sampled scatter mode
+PAIR_DENSITY_MIN_ROWS = 200_000 # above this, pairs are drawn as a binned density
+PAIR_DENSITY_BINS = 60
+PROFILE_CHUNK_ROWS = 102_400    # rows read per chunk while profiling (multiple of 64: null-mask words)
+BOXPLOT_MAX_FLIERS = 1000
+DATETIME_SAMPLE_SIZE = 500      # values parsed to decide whether an object column holds dates
+HEATMAP_ANNOT_MAX = 20          # annotate cells only up to this many columns
+HEATMAP_LABEL_MAX = 60          # tick labels only up to this many columns
+HEATMAP_BLOCK_SIZE = 50         # wider matrices show their top block of this many columns
+HEATMAP_BLOCK_RANKINGS = {"correlation": "Strongest mean |corr|", "variance": "Largest variance"}
+TIME_TICK_LABELS = 30           # at most this many labelled bars on a time series chart
+TIME_LABEL_FORMATS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d", "week": "%Y-%m-%d",
+                      "month": "%Y-%m", "year": "%Y"}
+
+# Chart output modes: how each chart is encoded and embedded in the PDF
+OUTPUT_MODES = {
+    "png": "PNG raster",
+    "vector": "Vector drawings (SVG)",
+    "compressed": "Compressed raster (JPEG / palette PNG)",
+}
+DEFAULT_JPEG_QUALITY = 75
+DEFAULT_OUTPUT = ("png", DEFAULT_JPEG_QUALITY, 0)
+
 
 def detect_encoding(file):
     try:
@@ -44,39 +104,104 @@ def detect_encoding(file, sample_size=10000):
     result = chardet.detect(raw_data)
     return result.get("encoding")
 
-def read_csv_with_encoding(file, sample_size=None):
-    detected_encoding = detect_encoding(file)
+def _rewind(file):
+    if not isinstance(file, (str, os.PathLike)):
+        file.seek(0)
+
+def sniff_delimiter(file, encoding, sample_size=10000):
+    """Delimiter from the first complete lines of the file (',' if undecidable)."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            raw_data = f.read(sample_size)
+    else:
+        raw_data = file.read(sample_size)
+        file.seek(0)
+    text = raw_data.decode(encoding, errors="ignore")
+    if "\n" in text:
+        text = text[:text.rfind("\n")]
+    try:
+        return csv.Sniffer().sniff(text, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+def iter_csv_chunks(file, sample_size=None, chunksize=PROFILE_CHUNK_ROWS, encoding=None):
+    """
+    Stream the CSV in chunks with the fast C parser: the encoding is detected
+    (or given) and the delimiter sniffed once from the start of the file.
+    Decoding is strict, so a first chunk the detected encoding cannot read
+    falls back to ISO-8859-1; a later chunk raises UnicodeDecodeError (see
+    profile_csv). A single parsed column is re-read without a header.
+    Returns (chunk iterator, None) or (None, error).
+    """
+    detected_encoding = encoding or detect_encoding(file)
     if detected_encoding is None:
         return None, "Encoding detection failed."
+    if detected_encoding.lower() == "ascii":
+        detected_encoding = "utf-8"  # the sample was plain ASCII; the rest may not be
+    sep = sniff_delimiter(file, detected_encoding)
 
-    try:
-        df = pd.read_csv(
-            file,
-            encoding=detected_encoding,
-            nrows=sample_size,
-            sep=None,
-            engine="python"
-        )
-    except Exception:
-        # fallback encoding
+    def open_reader(encoding, header="infer"):
+        _rewind(file)
+        reader = pd.read_csv(file, encoding=encoding, sep=sep,
+                             header=header, nrows=sample_size, chunksize=chunksize)
         try:
-            if isinstance(file, (str, os.PathLike)):
-                df = pd.read_csv(file, encoding="ISO-8859-1", nrows=sample_size, sep=None, engine="python")
-            else:
-                file.seek(0)
-                df = pd.read_csv(file, encoding="ISO-8859-1", nrows=sample_size, sep=None, engine="python")
-        except Exception as e2:
-            return None, f"Encoding Error: {e2}"
+            return reader, next(reader)
+        except BaseException:
+            reader.close()
+            raise
 
-    if df.empty or len(df.columns) <= 1:
+    try:
         try:
-            if not isinstance(file, (str, os.PathLike)):
-                file.seek(0)
-            df = pd.read_csv(file, encoding=detected_encoding, header=None, sep=None, engine="python")
-        except Exception as e:
-            return None, f"Final Read Error: {e}"
+            reader, first = open_reader(detected_encoding)
+        except (UnicodeDecodeError, LookupError):
+            reader, first = open_reader("ISO-8859-1")
+            detected_encoding = "ISO-8859-1"
+        if len(first.columns) <= 1:
+            # close() detaches pandas' text wrapper; left to the garbage collector
+            # it would close an uploaded stream under the second reader
+            reader.close()
+            reader, first = open_reader(detected_encoding, header=None)
+    except StopIteration:
+        return None, "Final Read Error: the file has no rows."
+    except Exception as e:
+        return None, f"Encoding Error: {e}"
 
-    return df, None
+    return itertools.chain([first], reader), None
+
+def profile_csv(file, sample_size=None, chunksize=PROFILE_CHUNK_ROWS, float32=False, encoding=None):
+    """
+    Single pass over the CSV building a profiler.DatasetProfile. Column types
+    are detected on the first chunk; later chunks are coerced to that schema,
+    and values that do not fit it are counted (DatasetProfile.coerced) rather
+    than passing silently as missing. If a chunk past the detection sample
+    does not decode, profiling restarts once as ISO-8859-1.
+    Returns (profile, None) or (None, error).
+    """
+    chunks, error = iter_csv_chunks(file, sample_size, chunksize, encoding)
+    if error:
+        return None, error
+
+    profile = None
+    try:
+        for chunk in chunks:
+            if profile is None:
+                column_types, converted = detect_column_types(chunk)
+                datetime_formats = {col: infer_datetime_format(chunk[col])[1]
+                                    for col in column_types['datetime']
+                                    if pd.api.types.is_object_dtype(chunk[col])}
+                profile = profiler.DatasetProfile(column_types, float32=float32,
+                                                  datetime_formats=datetime_formats)
+                profile.count_coerced(chunk, converted)
+                chunk = converted
+            profile.update(chunk)
+    except UnicodeDecodeError as e:
+        if encoding == "ISO-8859-1":
+            return None, f"Encoding Error: {e}"
+        print(f"Decoding failed past the detection sample ({e}); retrying as ISO-8859-1.")
+        return profile_csv(file, sample_size, chunksize, float32, encoding="ISO-8859-1")
+    except Exception as e:
+        return None, f"Read Error: {e}"
+    return profile, None
 
 def add_table_of_contents(p):
     p.setFont("Helvetica-Bold", 18)
@@ -85,11 +210,13 @@ def add_table_of_contents(p):
     p.setFont("Helvetica", 12)
     toc_items = [
         "1. Dataset Summary",
-        "2. Correlation Heatmap",
-        "3. Correlated Feature Comparisons",
-        "4. Numeric Column Visualizations",
-        "5. Categorical Column Visualizations",
-        "6. Date/Time Column Visualizations"
+        "2. Missing Value Structure",
+        "3. Correlation Heatmap",
+        "4. Correlated Feature Comparisons",
+        "5. Categorical Associations",
+        "6. Numeric Column Visualizations",
+        "7. Categorical Column Visualizations",
+        "8. Date/Time Column Visualizations"
     ]
 
     y = 710
@@ -99,15 +226,39 @@ def add_table_of_contents(p):
 
     p.showPage()
 
-def add_dataset_summary(df, column_types, p):
+def add_profile_summary(profile, column_types, p):
+    draw_dataset_summary(p, profile.rows, len(profile.columns), column_types, profile.missing_pct(),
+                         profile.distinct_counts())
+
+def add_skipped_charts(p, plan):
+    """List the charts the render budget left out, most informative first."""
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(120, 750, "Charts Skipped for the Render Budget")
+    p.setFont("Helvetica", 10)
+    y = 720
+    p.drawString(50, y, f"{len(plan['skipped'])} charts were left out. Estimated build: "
+                        f"{plan['estimated_seconds']} s, {plan['estimated_pages']} pages.")
+    y -= 25
+    section_names = {"histograms": "Histogram", "bar_charts": "Bar chart",
+                     "time_series": "Time series", "boxplots": "Boxplot"}
+    for section, col, score in sorted(plan["skipped"], key=lambda item: -item[2]):
+        p.drawString(70, y, f"{section_names[section]}: {col} (informativeness {score:.2f})")
+        y -= 15
+        if y < 100:
+            p.showPage()
+            p.setFont("Helvetica", 10)
+            y = 750
+    p.showPage()
+
+def draw_dataset_summary(p, total_rows, total_columns, column_types, missing_pct, distinct_counts=None):
     p.setFont("Helvetica-Bold", 18)
     p.drawString(180, 750, "Dataset Summary")
 
     p.setFont("Helvetica", 12)
     y = 720
-    p.drawString(50, y, f"Total Rows: {len(df)}")
+    p.drawString(50, y, f"Total Rows: {total_rows}")
     y -= 20
-    p.drawString(50, y, f"Total Columns: {df.shape[1]}")
+    p.drawString(50, y, f"Total Columns: {total_columns}")
     y -= 30
 
     p.setFont("Helvetica-Bold", 14)
@@ -123,19 +274,71 @@ def add_dataset_summary(df, column_types, p):
     p.drawString(50, y, "Missing Value Summary:")
     y -= 20
     p.setFont("Helvetica", 10)
-    nulls = df.isnull().sum()
-    for col in df.columns:
-        missing_pct = 100 * nulls[col] / len(df)
-        if missing_pct > 0:
-            p.drawString(70, y, f"{col}: {missing_pct:.1f}% missing")
+    for col, pct in missing_pct.items():
+        if pct > 0:
+            p.drawString(70, y, f"{col}: {pct:.1f}% missing")
+            y -= 15
+            if y < 100:
+                p.showPage()
+                y = 750
+
+    if distinct_counts:
+        y -= 10
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(50, y, "Distinct Values:")
+        y -= 20
+        p.setFont("Helvetica", 10)
+        estimated = False
+        for col, (count, exact) in distinct_counts.items():
+            marker = "" if exact else "~"
+            estimated = estimated or not exact
+            p.drawString(70, y, f"{col}: {marker}{count:,}")
             y -= 15
             if y < 100:
                 p.showPage()
                 y = 750
+        if estimated:
+            error = 100 * profiler.HyperLogLog().error
+            p.drawString(70, y, f"~ HyperLogLog estimate (relative standard error {error:.1f}%)")
 
     p.showPage()
 
+def infer_datetime_format(series):
+    """
+    Decide from a few hundred non-null values whether an object column holds
+    dates. Returns (True, format) or (False, None); the format is inferred from
+    the first value the way pd.to_datetime does, and is None when the values
+    need per-element parsing.
+    """
+    sample = series.head(DATETIME_SAMPLE_SIZE * 10).dropna()
+    if sample.empty:
+        sample = series.dropna()
+    sample = sample.head(DATETIME_SAMPLE_SIZE)
+    if sample.empty:
+        return False, None
+
+    fmt = guess_datetime_format(str(sample.iloc[0]))
+    try:
+        pd.to_datetime(sample, format=fmt or "mixed", errors='raise')
+    except (ValueError, TypeError, OverflowError):
+        return False, None
+    return True, fmt
+
+def convert_datetime_column(series, fmt):
+    """Full-column conversion with an explicit format; None if any value fails to parse."""
+    converted = pd.to_datetime(series, format=fmt or "mixed", errors='coerce')
+    if (converted.isna() & series.notna()).any():
+        return None
+    return converted
+
 def detect_column_types(df):
+    """
+    Column types for `df`, plus a copy of `df` with detected date columns
+    converted (the caller's frame is left untouched). Object columns are tested
+    for dates on a small sample first, so non-date columns cost roughly the same
+    whatever their length; only confirmed columns are parsed in full.
+    """
+    df = df.copy(deep=False)
     column_types = {
         'numeric': [],
         'categorical': [],
@@ -155,116 +358,594 @@ def detect_column_types(df):
         elif pd.api.types.is_datetime64_any_dtype(dtype):
             column_types['datetime'].append(col)
         elif pd.api.types.is_object_dtype(dtype):
-            try:
-                converted = pd.to_datetime(df[col], errors='raise')
+            is_date, fmt = infer_datetime_format(df[col])
+            converted = convert_datetime_column(df[col], fmt) if is_date else None
+            if converted is not None:
                 df[col] = converted
                 column_types['datetime'].append(col)
-            except:
-                unique_ratio = df[col].nunique() / max(1, len(df[col]))
-                if unique_ratio < 0.5:
-                    column_types['categorical'].append(col)
-                else:
-                    column_types['text'].append(col)
+            else:
+                kind = profiler.classify_object_column(profiler.approx_distinct(df[col]), len(df[col]))
+                column_types[kind].append(col)
         else:
             column_types['unsupported'].append(col)
 
     return column_types, df
 
 
+def chart_output(mode="png", quality=DEFAULT_JPEG_QUALITY, palette_colors=0):
+    """
+    Normalized (mode, quality, palette_colors) tuple passed to the renderers.
+    'compressed' writes a palette PNG when palette_colors > 0, else a JPEG at
+    `quality`. 'vector' needs svglib and falls back to PNG without it.
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {mode}")
+    if mode == "vector" and not HAS_SVGLIB:
+        print("svglib is not installed; rendering charts as PNG.")
+        mode = "png"
+    if mode != "compressed":
+        return (mode, DEFAULT_JPEG_QUALITY, 0)
+    return (mode, int(quality), int(palette_colors))
+
+def is_vector_chart(data):
+    head = data[:64].lstrip()
+    return head.startswith(b"<?xml") or head.startswith(b"<svg")
+
+def draw_chart(p, data, x, y, width, height, preserve_aspect=False):
+    """Draw encoded chart bytes (PNG/JPEG image or SVG drawing) into a box on the canvas."""
+    if is_vector_chart(data):
+        drawing = svg2rlg(io.BytesIO(data))
+        scale_x, scale_y = width / drawing.width, height / drawing.height
+        if preserve_aspect:
+            scale_x = scale_y = min(scale_x, scale_y)
+            x += (width - drawing.width * scale_x) / 2
+            y += (height - drawing.height * scale_y) / 2
+        drawing.scale(scale_x, scale_y)
+        renderPDF.draw(drawing, p, x, y)
+    else:
+        p.drawImage(ImageReader(io.BytesIO(data)), x, y, width=width, height=height,
+                    preserveAspectRatio=preserve_aspect)
+
 def draw_image_on_canvas(p, img_buffer, y_position, height=300):
-    img = ImageReader(img_buffer)
-    p.drawImage(img, 50, y_position - height, width=500, height=height, preserveAspectRatio=True)
+    draw_chart(p, img_buffer.getvalue(), 50, y_position - height, 500, height, preserve_aspect=True)
     y_position -= (height + 20)
     if y_position < 100:
         p.showPage()
         y_position = 750
     return y_position
 
-def generate_histograms(df, p):
+# ===== Chart rendering =====
+# Every chart is described as a picklable job (kind, label, data, options) and
+# rendered to PNG bytes, either in-process or in a pool of worker processes.
+# Results are always consumed in job order, so the PDF layout does not depend
+# on the worker count.
+
+def gaussian_kde_curve(values, grid, seed=0):
+    """Gaussian KDE (Scott's bandwidth) fitted on a bounded random sample of `values`."""
+    if len(values) > KDE_SAMPLE_SIZE:
+        values = np.random.default_rng(seed).choice(values, KDE_SAMPLE_SIZE, replace=False)
+    std = values.std()
+    if len(values) < 2 or std == 0:
+        return None
+    bandwidth = std * len(values) ** (-1 / 5)
+    z = (grid[:, None] - values[None, :]) / bandwidth
+    return np.exp(-0.5 * z ** 2).sum(axis=1) / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+def histogram_aggregate(profile, col, bins=HISTOGRAM_BINS, kde=True):
+    """
+    Everything the histogram needs, taken from the profile: exact bar counts for
+    small integer domains, otherwise the streaming histogram re-binned to `bins`
+    plus a KDE curve fitted on the row sample and scaled to counts.
+    """
+    small_ints = profile.small_ints.get(col)
+    if small_ints is not None and small_ints.distinct:
+        counts = small_ints.sorted_counts()
+        return {"kind": "count", "labels": counts.index.tolist(), "counts": counts.values}
+
+    moments = profile.moments[col]
+    if moments.n == 0:
+        return None
+    low, high = moments.min, moments.max
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    counts, edges = profile.histograms[col].rebin(bins, low, high)
+    aggregate = {"kind": "hist", "counts": counts, "edges": edges, "kde_x": None, "kde_y": None}
+    if not kde:
+        return aggregate
+    grid = np.linspace(edges[0], edges[-1], KDE_GRID_POINTS)
+    density = gaussian_kde_curve(profile.sample_values(col).to_numpy(dtype=float), grid)
+    if density is not None:
+        aggregate["kde_x"] = grid
+        aggregate["kde_y"] = density * moments.n * (edges[1] - edges[0])
+    return aggregate
+
+def box_aggregate(profile, col):
+    """
+    Box statistics from the row sample. The true min/max (from the running
+    moments) are added as fliers when they fall outside the whiskers, so extreme
+    outliers are never lost to sampling.
+    """
+    values = profile.sample_values(col).to_numpy(dtype=float)
+    if len(values) == 0:
+        return None
+    stats = boxplot_stats(values)[0]
+    fliers = stats["fliers"]
+    if len(fliers) > BOXPLOT_MAX_FLIERS:
+        fliers = np.random.default_rng(0).choice(fliers, BOXPLOT_MAX_FLIERS, replace=False)
+    moments = profile.moments[col]
+    extremes = [v for v in (moments.min, moments.max) if v < stats["whislo"] or v > stats["whishi"]]
+    stats["fliers"] = np.concatenate([fliers, extremes])
+    stats["label"] = ""
+    return stats
+
+def _plot_histogram(ax, aggregate):
+    if aggregate["kind"] == "count":
+        positions = np.arange(len(aggregate["counts"]))
+        ax.bar(positions, aggregate["counts"], color=sns.color_palette()[0])
+        ax.set_xticks(positions, [str(label) for label in aggregate["labels"]])
+        ax.set_ylabel("count")
+        return
+    edges = aggregate["edges"]
+    ax.bar(edges[:-1], aggregate["counts"], width=np.diff(edges), align="edge",
+           color="blue", alpha=0.5, edgecolor="white")
+    if aggregate["kde_x"] is not None:
+        ax.plot(aggregate["kde_x"], aggregate["kde_y"], color="blue")
+    ax.set_ylabel("Count")
+
+def _plot_bar_chart(ax, counts):
+    sns.barplot(x=counts.values, y=counts.index, hue=counts.index, palette="Set2", legend=False, ax=ax)
+
+def _plot_time_series(ax, time_counts):
+    time_counts.plot(kind='bar', ax=ax)
+    step = -(-len(time_counts) // TIME_TICK_LABELS)
+    if step > 1:
+        ax.set_xticks(range(0, len(time_counts), step))
+        ax.set_xticklabels(time_counts.index[::step])
+
+def _plot_boxplot(ax, stats):
+    ax.bxp([stats], vert=False, widths=0.8, patch_artist=True,
+           boxprops={"facecolor": "orange"}, medianprops={"color": "black"})
+    ax.set_yticks([])
+
+def _plot_heatmap(ax, aggregate):
+    matrix = aggregate["matrix"]
+    labels = len(matrix) <= HEATMAP_LABEL_MAX
+    signed = aggregate.get("signed", True)
+    sns.heatmap(matrix, annot=aggregate["annot"], fmt='.2f', cmap='coolwarm' if signed else 'Reds', cbar=True,
+                vmin=-1 if signed else 0, vmax=1, xticklabels=labels, yticklabels=labels, ax=ax)
+    if labels and not aggregate["annot"]:
+        ax.tick_params(labelsize=6)
+
+def stratified_sample_indices(x, size, strata=10, seed=0):
+    """Indices of an ~equal-size random sample from each x-quantile stratum."""
+    n = len(x)
+    if n <= size:
+        return np.arange(n)
+    edges = np.quantile(x, np.linspace(0, 1, strata + 1)[1:-1])
+    labels = np.digitize(x, edges)
+    keys = np.random.default_rng(seed).random(n)
+    order = np.lexsort((keys, labels))
+    sorted_labels = labels[order]
+    rank = np.arange(n) - np.searchsorted(sorted_labels, sorted_labels, side="left")
+    return np.sort(order[rank < max(1, size // strata)])
+
+def pair_aggregate(pair, mode="auto", rows=None, line=None):
+    """
+    Size-aware pair plot data. The regression line is always a closed-form
+    least-squares fit on every row; what gets drawn is bounded:
+    - "full": original regplot (small data only)
+    - "sample": stratified sample of PAIR_SAMPLE_POINTS points
+    - "density": 2-D binned counts (histogram2d)
+    When `pair` is a row sample, `rows` is the full pairwise row count (density
+    counts are scaled up to it) and `line` the (slope, intercept) fitted on all rows.
+    """
+    col1, col2 = pair.columns
+    pair = pair.dropna()
+    n = len(pair) if rows is None else rows
+    if mode == "auto":
+        if n <= REGPLOT_MAX_ROWS:
+            mode = "full"
+        elif n < PAIR_DENSITY_MIN_ROWS:
+            mode = "sample"
+        else:
+            mode = "density"
+    if mode == "full":
+        return {"mode": "full", "data": pair}
+
+    x = pair[col1].to_numpy(dtype=float)
+    y = pair[col2].to_numpy(dtype=float)
+    if line is None:
+        x_mean, y_mean = x.mean(), y.mean()
+        x_var = ((x - x_mean) ** 2).sum()
+        slope = ((x - x_mean) * (y - y_mean)).sum() / x_var if x_var else 0.0
+        intercept = y_mean - slope * x_mean
+    else:
+        slope, intercept = line
+
+    aggregate = {"mode": mode, "x_label": col1, "y_label": col2, "rows": n,
+                 "line_x": np.array([x.min(), x.max()]),
+                 "line_y": intercept + slope * np.array([x.min(), x.max()])}
+    if mode == "density":
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=PAIR_DENSITY_BINS)
+        if len(x):
+            counts = counts * (n / len(x))
+        aggregate.update(counts=counts, x_edges=x_edges, y_edges=y_edges)
+    else:
+        keep = stratified_sample_indices(x, PAIR_SAMPLE_POINTS)
+        aggregate.update(x=x[keep], y=y[keep])
+    return aggregate
+
+def _plot_regplot(ax, aggregate):
+    if aggregate["mode"] == "full":
+        pair = aggregate["data"]
+        col1, col2 = pair.columns
+        sns.regplot(data=pair, x=col1, y=col2, line_kws={"color": "red"},
+                    scatter_kws={"rasterized": True}, seed=0, ax=ax)
+        return
+
+    if aggregate["mode"] == "density":
+        counts = np.ma.masked_equal(aggregate["counts"].T, 0)
+        mesh = ax.pcolormesh(aggregate["x_edges"], aggregate["y_edges"], counts,
+                             cmap="Blues", norm=LogNorm(), rasterized=True)
+        ax.figure.colorbar(mesh, ax=ax, label="rows per bin")
+    else:
+        ax.scatter(aggregate["x"], aggregate["y"], s=8, alpha=0.4, rasterized=True)
+    ax.plot(aggregate["line_x"], aggregate["line_y"], color="red")
+    ax.set_xlabel(aggregate["x_label"])
+    ax.set_ylabel(aggregate["y_label"])
+
+def _plot_nullity_matrix(ax, matrix):
+    image = ax.imshow(matrix.to_numpy(), aspect="auto", cmap="Greys", vmin=0, vmax=1, interpolation="nearest")
+    ax.figure.colorbar(image, ax=ax, label="Missing fraction")
+    if len(matrix.columns) <= HEATMAP_LABEL_MAX:
+        ax.set_xticks(range(len(matrix.columns)))
+        ax.set_xticklabels(matrix.columns, rotation=90, fontsize=7)
+    else:
+        ax.set_xlabel(f"{len(matrix.columns)} columns")
+    ticks = np.linspace(0, len(matrix) - 1, min(len(matrix), 6)).astype(int)
+    ax.set_yticks(ticks)
+    ax.set_yticklabels([f"{matrix.index[i]:,}" for i in ticks])
+    ax.set_ylabel("Row")
+
+PLOT_RENDERERS = {
+    "histogram": (_plot_histogram, (10, 5)),
+    "bar chart": (_plot_bar_chart, (10, 5)),
+    "time series": (_plot_time_series, (12, 5)),
+    "boxplot": (_plot_boxplot, (10, 5)),
+    "heatmap": (_plot_heatmap, (12, 7)),
+    "nullity matrix": (_plot_nullity_matrix, (12, 6)),
+    "pair plot": (_plot_regplot, (8, 5)),
+}
+
+# Figures are plain Figure/FigureCanvasAgg objects (no pyplot global state),
+# kept one per plot kind and per thread so concurrent sessions never share one.
+_figure_cache = threading.local()
+
+def get_figure(kind):
+    """Return this thread's reusable, cleared Figure for a plot kind."""
+    figures = getattr(_figure_cache, "figures", None)
+    if figures is None:
+        figures = _figure_cache.figures = {}
+    fig = figures.get(kind)
+    if fig is None:
+        fig = Figure(figsize=PLOT_RENDERERS[kind][1], dpi=100)
+        FigureCanvasAgg(fig)
+        figures[kind] = fig
+    fig.clear()
+    return fig
+
+def encode_figure(fig, output=DEFAULT_OUTPUT):
+    """Encode a drawn figure as PNG, SVG, JPEG or palette PNG bytes."""
+    mode, quality, palette_colors = output
+    img_buffer = io.BytesIO()
+    if mode == "vector":
+        # Text stays text and dense layers (scatter, meshes: rasterized=True) are
+        # embedded as images, which keeps the SVG small and quick to convert
+        with matplotlib.rc_context({"svg.fonttype": "none"}):
+            fig.savefig(img_buffer, format="svg", dpi=150)
+    elif mode == "compressed" and palette_colors:
+        raw = io.BytesIO()
+        fig.canvas.print_png(raw)
+        image = Image.open(raw).convert("RGB").quantize(colors=palette_colors)
+        image.save(img_buffer, format="PNG", optimize=True)
+    elif mode == "compressed":
+        fig.canvas.print_jpg(img_buffer, pil_kwargs={"quality": quality, "optimize": True})
+    else:
+        fig.canvas.print_png(img_buffer)
+    return img_buffer.getvalue()
+
+def render_plot(job, output=DEFAULT_OUTPUT):
+    """Render one chart job to encoded bytes (see encode_figure). Returns None (and logs) on failure."""
+    kind, label, data, title = job
+    plot = PLOT_RENDERERS[kind][0]
+    try:
+        fig = get_figure(kind)
+        try:
+            ax = fig.add_subplot()
+            plot(ax, data)
+            ax.set_title(title)
+            fig.tight_layout()
+            return encode_figure(fig, output)
+        finally:
+            fig.clear()  # drop artists so the cached figure holds no data
+    except Exception as e:
+        print(f"Failed {kind} for {label}: {e}")
+        return None
+
+def default_render_workers():
+    return max(1, min(MAX_RENDER_WORKERS, (os.cpu_count() or 1) - 1))
+
+_render_pool = None
+_render_pool_workers = 0
+_render_pool_lock = threading.Lock()
+
+def shared_render_pool(workers=None):
+    """
+    Process pool for chart rendering, or None to render in-process. One pool
+    is kept for the whole process, so the cost of starting workers (spawn plus
+    matplotlib imports) is paid once rather than per report. Asking for a
+    different worker count replaces it; work already submitted to the old pool
+    still finishes. Uses 'spawn' so workers never inherit the Streamlit
+    server's threads.
+    """
+    global _render_pool, _render_pool_workers
+    workers = default_render_workers() if workers is None else workers
+    if workers <= 1:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _render_pool_workers = workers
+        return _render_pool
+
+def reset_render_pool():
+    """Drop the shared pool (e.g. after a worker died); the next shared_render_pool() starts a new one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+def render_jobs(jobs, pool=None, cache=None, output=DEFAULT_OUTPUT, lookahead=RENDER_LOOKAHEAD_PER_WORKER):
+    """
+    Yield encoded chart bytes (or None) for each job, in job order. Jobs are
+    submitted to the pool at most `lookahead` ahead of the one being consumed,
+    so only that many finished charts wait in memory. With a section cache
+    (report_cache.DiskCache), charts whose job and output are unchanged are
+    read back from disk when their turn comes and only the misses are rendered.
+    """
+    render = partial(render_plot, output=output)
+
+    def schedule(job):
+        key = None if cache is None else report_cache.section_key((output, job))
+        if key is not None and cache.touch(key):
+            return job, key, True, None
+        future = None
+        if pool is not None:
+            try:
+                future = pool.submit(render, job)
+            except RuntimeError:
+                pass  # the shared pool was replaced or shut down meanwhile: render in-process
+        return job, key, False, future
+
+    jobs = iter(jobs)
+    pending = deque(schedule(job) for job in itertools.islice(jobs, max(1, lookahead)))
+    try:
+        while pending:
+            job, key, hit, future = pending.popleft()
+            pending.extend(schedule(job) for job in itertools.islice(jobs, 1))
+            png = cache.get(key) if hit else None
+            if png is None:
+                # A miss, or a hit evicted since it was scheduled
+                png = future.result() if future is not None else render(job)
+                if png is not None and key is not None:
+                    cache.put(key, png)
+            yield png
+    finally:
+        # The pool outlives this report: don't leave abandoned charts queued on it
+        for _, _, _, future in pending:
+            if future is not None:
+                future.cancel()
+
+def draw_rendered(p, images):
     plot_count = 0
-    for col in df.columns:
+    for png in images:
+        if png is not None:
+            plot_count = draw_plot_with_limit(p, io.BytesIO(png), plot_count)
+    return plot_count
+
+def histogram_jobs(profile, columns):
+    jobs = []
+    for col in columns:
         try:
-            plt.figure(figsize=(10, 5))
-            if pd.api.types.is_integer_dtype(df[col]) and df[col].nunique() < 20:
-                sns.countplot(x=df[col])
-            else:
-                sns.histplot(df[col], kde=True, color='blue', bins=30)
-            plt.title(f"Histogram for {col}")
-            plt.tight_layout()
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=100)
-            img_buffer.seek(0)
-            plt.close()
-            plot_count = draw_plot_with_limit(p, img_buffer, plot_count)
+            aggregate = histogram_aggregate(profile, col)
+            if aggregate is None:
+                continue
+            jobs.append(("histogram", col, aggregate, f"Histogram for {col}"))
         except Exception as e:
             print(f"Failed histogram for {col}: {e}")
-    return plot_count
+    return jobs
 
-def generate_bar_charts(df, p):
-    plot_count = 0
-    for col in df.columns:
+def bar_chart_jobs(profile, columns):
+    jobs = []
+    for col in columns:
         try:
-            counts = df[col].value_counts().nlargest(10)
+            counts = profile.values[col].top(10)
             if counts.empty:
                 continue
-            plt.figure(figsize=(10, 5))
-            sns.barplot(x=counts.values, y=counts.index, hue=counts.index, palette="Set2", legend=False)
-            plt.title(f"Top Categories in {col}")
-            plt.tight_layout()
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=100)
-            img_buffer.seek(0)
-            plt.close()
-            plot_count = draw_plot_with_limit(p, img_buffer, plot_count)
+            jobs.append(("bar chart", col, counts, f"Top Categories in {col}"))
         except Exception as e:
             print(f"Failed bar chart for {col}: {e}")
-    return plot_count
+    return jobs
 
-def generate_time_series(df, p):
-    plot_count = 0
-    for col in df.columns:
+def time_series_jobs(profile, columns):
+    jobs = []
+    for col in columns:
         try:
-            time_counts = df[col].dt.to_period("M").value_counts().sort_index()
+            buckets = profile.time_counts[col]
+            granularity = buckets.granularity()
+            time_counts = buckets.bucket_counts(granularity)
             if time_counts.empty:
                 continue
-            plt.figure(figsize=(12, 5))
-            time_counts.plot(kind='bar')
-            plt.title(f"Records Over Time in {col}")
-            plt.tight_layout()
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=100)
-            img_buffer.seek(0)
-            plt.close()
-            plot_count = draw_plot_with_limit(p, img_buffer, plot_count)
+            time_counts.index = time_counts.index.strftime(TIME_LABEL_FORMATS[granularity])
+            jobs.append(("time series", col, time_counts, f"Records per {granularity.capitalize()} in {col}"))
         except Exception as e:
             print(f"Failed time series for {col}: {e}")
-    return plot_count
+    return jobs
 
-def generate_correlation_heatmap(df, p, y_position):
-    corr_matrix = df.corr(numeric_only=True)
-    plt.figure(figsize=(12, 7))
-    sns.heatmap(corr_matrix, annot=True, fmt='.2f', cmap='coolwarm', cbar=True)
-    plt.title("Correlation Heatmap")
-    plt.tight_layout()
+def boxplot_jobs(profile, columns):
+    jobs = []
+    for col in columns:
+        try:
+            stats = box_aggregate(profile, col)
+            if stats is None:
+                continue
+            jobs.append(("boxplot", col, stats, f"Boxplot for {col}"))
+        except Exception as e:
+            print(f"Failed boxplot for {col}: {e}")
+    return jobs
 
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=100)
-    img_buffer.seek(0)
-    plt.close()
+def cluster_order(corr_matrix):
+    """
+    Leaf order of an average-linkage clustering on 1 - |corr|, so strongly
+    correlated columns end up adjacent. Plain NumPy, O(k^3): meant for the
+    displayed block (<= HEATMAP_BLOCK_SIZE columns), not the full matrix.
+    """
+    k = len(corr_matrix)
+    if k < 3:
+        return list(range(k))
+    dist = 1 - np.abs(np.nan_to_num(np.asarray(corr_matrix, dtype=float), nan=0.0))
+    np.fill_diagonal(dist, np.inf)
+    clusters = {i: [i] for i in range(k)}
+    sizes = np.ones(k)
+    for _ in range(k - 1):
+        i, j = np.unravel_index(np.argmin(dist), dist.shape)
+        # Lance-Williams update for average linkage; j is merged into i
+        merged = (sizes[i] * dist[i] + sizes[j] * dist[j]) / (sizes[i] + sizes[j])
+        dist[i, :] = dist[:, i] = merged
+        dist[j, :] = dist[:, j] = np.inf
+        dist[i, i] = np.inf
+        clusters[i] = clusters[i] + clusters.pop(j)
+        sizes[i] += sizes[j]
+    return next(iter(clusters.values()))
 
-    return draw_image_on_canvas(p, img_buffer, y_position)
+def top_block(corr_matrix, size=HEATMAP_BLOCK_SIZE, variances=None):
+    """
+    Columns of the displayed block: the `size` columns with the largest
+    variance when `variances` is given, else the largest mean |corr| with the
+    other columns.
+    """
+    if variances is not None:
+        strength = variances.reindex(corr_matrix.columns).fillna(0)
+    else:
+        values = np.abs(corr_matrix.to_numpy())
+        np.fill_diagonal(values, np.nan)
+        with np.errstate(invalid="ignore"):
+            strength = pd.Series(np.nan_to_num(np.nanmean(values, axis=1)) if len(values) else [],
+                                 index=corr_matrix.columns)
+    return strength.nlargest(size).index
 
-def generate_correlation_pair_plots(df, p, y_position, threshold=0.5):
-    corr_matrix = df.corr(numeric_only=True)
-    upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
+def heatmap_aggregate(corr_matrix, variances=None, signed=True):
+    """
+    Size-aware heatmap data: annotated up to HEATMAP_ANNOT_MAX columns; above
+    that no annotations and a clustering order; above HEATMAP_BLOCK_SIZE only
+    the top block (by |corr| or variance) is drawn. The full matrix is meant
+    to be exported with correlation_sidecar. `signed=False` draws a 0..1 scale
+    (associations such as Cramer's V).
+    """
+    total = len(corr_matrix)
+    if total > HEATMAP_BLOCK_SIZE:
+        columns = top_block(corr_matrix, HEATMAP_BLOCK_SIZE, variances)
+        corr_matrix = corr_matrix.loc[columns, columns]
+    if len(corr_matrix) > HEATMAP_ANNOT_MAX:
+        order = corr_matrix.columns[cluster_order(corr_matrix)]
+        corr_matrix = corr_matrix.loc[order, order]
+    return {
+        "matrix": corr_matrix,
+        "annot": len(corr_matrix) <= HEATMAP_ANNOT_MAX,
+        "total": total,
+        "block": "variance" if variances is not None else "correlation",
+        "signed": signed,
+    }
 
-    correlated_pairs = [
-        (row, col, upper.loc[row, col])
-        for row in upper.index
-        for col in upper.columns
-        if not pd.isna(upper.loc[row, col]) and abs(upper.loc[row, col]) >= threshold
-    ]
+def heatmap_job(corr_matrix, variances=None, title="Correlation Heatmap", label="correlation matrix", signed=True):
+    aggregate = heatmap_aggregate(corr_matrix, variances, signed)
+    if len(aggregate["matrix"]) < aggregate["total"]:
+        ranked_by = "variance" if variances is not None else "mean |corr|"
+        title += f" (top {len(aggregate['matrix'])} of {aggregate['total']} columns by {ranked_by})"
+    elif not aggregate["annot"]:
+        title += " (clustered)"
+    return ("heatmap", label, aggregate, title)
 
+def missingness_jobs(profile):
+    """
+    Nullity matrix and co-missingness heatmap, both from the profile's packed
+    null masks; empty when no column has missing values.
+    """
+    nulls = profile.nulls
+    missing = nulls.null_counts()
+    missing = missing[missing > 0]
+    if missing.empty:
+        return []
+    matrix = nulls.nullity_matrix()[missing.index]
+    jobs = [("nullity matrix", "missing values", matrix,
+             f"Nullity Matrix ({len(missing)} columns with missing values, rows in blocks of {nulls.block_rows:,})")]
+    co_missing = nulls.co_missingness()
+    if len(co_missing) > 1:
+        jobs.append(heatmap_job(co_missing, title="Co-missingness Correlation", label="co-missingness"))
+    return jobs
+
+def association_jobs(profile):
+    """Cramer's V heatmap of the categorical columns; empty with fewer than two."""
+    association = profile.association()
+    if len(association) < 2:
+        return []
+    return [heatmap_job(association, title="Categorical Association (Cramer's V)",
+                        label="categorical association", signed=False)]
+
+def correlation_sidecar(corr_matrix, fmt="csv"):
+    """
+    The full correlation matrix as compact file bytes: 'csv' (4 significant
+    digits) or 'npz' (float32 matrix + column names, compressed).
+    """
+    if fmt == "csv":
+        return corr_matrix.to_csv(float_format="%.4g").encode("utf-8")
+    if fmt == "npz":
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, corr=corr_matrix.to_numpy(dtype=np.float32),
+                            columns=np.array([str(col) for col in corr_matrix.columns]))
+        return buffer.getvalue()
+    raise ValueError(f"Unknown sidecar format: {fmt}")
+
+def find_correlated_pairs(corr_matrix, threshold=0.5, top_k=5):
+    """Top-k column pairs by |corr| >= threshold, from the upper triangle."""
+    values = corr_matrix.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    upper = values[rows, cols]
+    strength = np.abs(upper)
+    hits = np.flatnonzero(~np.isnan(upper) & (strength >= threshold))
+    if top_k is not None and len(hits) > top_k:
+        hits = hits[np.argpartition(-strength[hits], top_k - 1)[:top_k]]
+    hits = hits[np.argsort(-strength[hits], kind="stable")]
+
+    names = corr_matrix.columns
+    return [(names[rows[i]], names[cols[i]], float(upper[i])) for i in hits]
+
+def pair_plot_jobs(profile, correlated_pairs, mode="auto"):
+    """Pair plots drawn from the row sample, with line and row count from the full data."""
+    covariance = profile.covariance
+    jobs = []
+    for col1, col2, corr_value in correlated_pairs[:5]:
+        rows = int(covariance.n[covariance.columns.index(col1), covariance.columns.index(col2)])
+        aggregate = pair_aggregate(profile.sample.frame[[col1, col2]], mode, rows=rows,
+                                   line=covariance.regression(col1, col2))
+        jobs.append(("pair plot", f"{col1} vs {col2}", aggregate,
+                     f"{col1} vs {col2} (corr = {corr_value:.2f})"))
+    return jobs
+
+def draw_correlation_pair_plots(p, y_position, correlated_pairs, images, threshold=0.5):
     if not correlated_pairs:
         p.setFont("Helvetica", 10)
         p.drawString(50, y_position, "No significantly correlated pairs found (|corr| >= 0.5).")
@@ -274,106 +955,329 @@ def generate_correlation_pair_plots(df, p, y_position, threshold=0.5):
     p.drawString(50, y_position, f"Top Correlated Feature Pairs (|corr| ≥ {threshold})")
     y_position -= 30
 
-    plot_count = 0
-    for col1, col2, corr_value in correlated_pairs[:5]:
-        plt.figure(figsize=(8, 5))
-        sns.regplot(data=df, x=col1, y=col2, line_kws={"color": "red"})
-        plt.title(f"{col1} vs {col2} (corr = {corr_value:.2f})")
-        plt.tight_layout()
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=100)
-        img_buffer.seek(0)
-        plt.close()
-        plot_count = draw_plot_with_limit(p, img_buffer, plot_count)
+    draw_rendered(p, images)
     return y_position
 
 def draw_plot_with_limit(p, img_buffer, plot_count, max_per_page=2):
     width, height = letter
     y_position = height - 300 if plot_count % max_per_page == 0 else height - 600
-    img = ImageReader(img_buffer)
-    p.drawImage(img, 50, y_position, width=500, height=250)
+    draw_chart(p, img_buffer.getvalue(), 50, y_position, 500, 250)
     plot_count += 1
     if plot_count % max_per_page == 0:
         p.showPage()
     return plot_count
 
-def generate_boxplots(df, p):
-    plot_count = 0
-    for col in df.columns:
-        try:
-            plt.figure(figsize=(10, 5))
-            sns.boxplot(x=df[col], color='orange')
-            plt.title(f"Boxplot for {col}")
-            plt.tight_layout()
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=100)
-            img_buffer.seek(0)
-            plt.close()
-            plot_count = draw_plot_with_limit(p, img_buffer, plot_count)
-        except Exception as e:
-            print(f"Failed boxplot for {col}: {e}")
-    return plot_count
+# ===== Interactive explorer =====
+def explorer_aggregates(profile, bins=HISTOGRAM_BINS, top_k=20):
+    """
+    Everything the in-app explorer draws, derived once from a profile: histogram
+    bins and summary stats per numeric column, top-k counts per categorical/text
+    column, bucketed counts per date column, the correlation matrix and the
+    categorical association (Cramer's V) matrix. Plain
+    pandas objects, so switching columns only indexes into this dict.
+    """
+    column_types = profile.column_types()
+    histograms, stats = {}, {}
+    for col in column_types['numeric']:
+        aggregate = histogram_aggregate(profile, col, bins, kde=False)
+        if aggregate is None:
+            continue
+        if aggregate["kind"] == "count":
+            index = pd.Index(aggregate["labels"], name=col)
+        else:
+            edges = aggregate["edges"]
+            index = pd.Index((edges[:-1] + edges[1:]) / 2, name=col)
+        histograms[col] = pd.DataFrame({"count": aggregate["counts"]}, index=index)
+        moments = profile.moments[col]
+        stats[col] = {"mean": moments.mean, "std": moments.std, "min": moments.min, "max": moments.max}
 
-def process_file(file, sample_size=None):
-    df, error = read_csv_with_encoding(file, sample_size)
-    if error:
-        return None, error
+    top_counts = {}
+    for col in column_types['categorical'] + column_types['text']:
+        counts = profile.values[col].top(top_k)
+        top_counts[col] = pd.DataFrame({"count": counts.values}, index=pd.Index(counts.index.astype(str), name=col))
 
-    try:
-        column_types, df = detect_column_types(df)
+    time_counts, time_granularity = {}, {}
+    for col in column_types['datetime']:
+        counts = profile.time_counts[col].bucket_counts()
+        time_counts[col] = pd.DataFrame({"count": counts.values}, index=counts.index.rename(col))
+        time_granularity[col] = counts.name
 
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-        y_position = height - 50
-
-        # Title Page
-        p.setFont("Helvetica-Bold", 20)
-        p.drawString(180, y_position, "CSV Analysis Report")
-        y_position -= 30
+    return {
+        "rows": profile.rows,
+        "column_types": column_types,
+        "missing_pct": profile.missing_pct(),
+        "distinct": profile.distinct_counts(),
+        "histograms": histograms,
+        "stats": stats,
+        "top_counts": top_counts,
+        "time_counts": time_counts,
+        "time_granularity": time_granularity,
+        "correlation": profile.correlation(),
+        "association": profile.association(),
+    }
+
+def new_section():
+    buffer = io.BytesIO()
+    return buffer, canvas.Canvas(buffer, pagesize=letter, invariant=1)
+
+def finish_section(buffer, p):
+    p.save()
+    return buffer.getvalue()
+
+def report_sections(profile, pool=None, cache=None, output=DEFAULT_OUTPUT,
+                    time_budget=None, page_budget=None, workers=1, on_plan=None, heatmap_block="correlation"):
+    """
+    The report as independent PDF sections: yields (title, PDF bytes) for each
+    section as soon as it is drawn, in report order. Charts of every section
+    go through one render stream (render_jobs) with a look-ahead of
+    RENDER_LOOKAHEAD_PER_WORKER per worker, so workers keep rendering the next
+    section while one is drawn, and only one section's canvas exists at a time.
+    With a time (seconds) or page budget, report_planner decides which
+    per-column charts to keep; `on_plan(plan)` receives the plan.
+    `heatmap_block` ranks the columns kept on a wide correlation heatmap (see
+    HEATMAP_BLOCK_RANKINGS and top_block).
+    """
+    if heatmap_block not in HEATMAP_BLOCK_RANKINGS:
+        raise ValueError(f"Unknown heatmap block ranking: {heatmap_block}")
+    column_types = profile.column_types()
+    corr_matrix = profile.correlation()
+    correlated_pairs = find_correlated_pairs(corr_matrix, threshold=0.5)
+    heatmap = heatmap_job(corr_matrix, profile.variances() if heatmap_block == "variance" else None)
+    missingness = missingness_jobs(profile)
+    associations = association_jobs(profile)
+    if time_budget is None and page_budget is None:
+        plan = report_planner.full_plan(column_types)
+    else:
+        heatmap_shapes = [(len(job[2]["matrix"]), job[2]["annot"])
+                          for job in [heatmap] + missingness + associations if job[0] == "heatmap"]
+        plan = report_planner.plan_report(profile, column_types, correlated_pairs,
+                                          time_budget, page_budget, workers, heatmap_shapes)
+    if on_plan is not None:
+        on_plan(plan)
+
+    # Each section takes exactly its own charts from the shared stream
+    section_jobs = [missingness, [heatmap], pair_plot_jobs(profile, correlated_pairs), associations,
+                    histogram_jobs(profile, plan['histograms']), bar_chart_jobs(profile, plan['bar_charts']),
+                    time_series_jobs(profile, plan['time_series']), boxplot_jobs(profile, plan['boxplots'])]
+    if sum(len(jobs) for jobs in section_jobs) < RENDER_POOL_MIN_JOBS:
+        pool = None
+    rendered = render_jobs(itertools.chain.from_iterable(section_jobs), pool, cache, output,
+                           RENDER_LOOKAHEAD_PER_WORKER * max(1, workers))
+    (missingness_images, heatmap_images, pair_images, association_images, histogram_images,
+     bar_chart_images, time_series_images, boxplot_images) = (itertools.islice(rendered, len(jobs))
+                                                              for jobs in section_jobs)
+
+    width, height = letter
+
+    # Title Page, table of contents and summary
+    buffer, p = new_section()
+    y_position = height - 50
+    p.setFont("Helvetica-Bold", 20)
+    p.drawString(180, y_position, "CSV Analysis Report")
+    y_position -= 30
+    p.setFont("Helvetica", 10)
+    p.drawString(180, y_position, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    p.showPage()
+    add_table_of_contents(p)
+    add_profile_summary(profile, column_types, p)
+    if plan['skipped']:
+        add_skipped_charts(p, plan)
+    yield "Dataset Summary", finish_section(buffer, p)
+
+    # Missing value structure
+    if missingness:
+        buffer, p = new_section()
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(50, height - 30, "Missing Value Structure")
+        draw_rendered(p, missingness_images)
+        yield "Missing Value Structure", finish_section(buffer, p)
+
+    # Correlation Heatmap
+    heatmap_png = next(iter(heatmap_images))
+    if heatmap_png is not None:
+        buffer, p = new_section()
+        y_position = draw_image_on_canvas(p, io.BytesIO(heatmap_png), height - 50)
+        if len(heatmap[2]["matrix"]) < heatmap[2]["total"]:
+            p.setFont("Helvetica", 10)
+            p.drawString(50, y_position, f"Only {len(heatmap[2]['matrix'])} of {heatmap[2]['total']} columns "
+                                         "are shown. The full matrix can be downloaded as CSV/NPZ on the Visualize page.")
+        yield "Correlation Heatmap", finish_section(buffer, p)
+
+    # Correlation Heatmap pairs
+    buffer, p = new_section()
+    draw_correlation_pair_plots(p, height - 30, correlated_pairs, pair_images, threshold=0.5)
+    yield "Correlated Feature Comparisons", finish_section(buffer, p)
+
+    # Categorical associations
+    association_png = next(iter(association_images), None)
+    if association_png is not None:
+        buffer, p = new_section()
+        y_position = draw_image_on_canvas(p, io.BytesIO(association_png), height - 50)
         p.setFont("Helvetica", 10)
-        p.drawString(180, y_position, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        p.showPage()
-        y_position = height - 50
+        p.drawString(50, y_position, f"Each column's {profiler.ASSOCIATION_TOP_K - 1} most frequent values "
+                                     "are kept; the rest are counted as one 'other' category.")
+        yield "Categorical Associations", finish_section(buffer, p)
 
-        # Add table_of_contents
-        add_table_of_contents(p)
-        add_dataset_summary(df, column_types, p)
+    for title, images in (("Numeric Column Visualizations", histogram_images),
+                          ("Categorical Column Visualizations", bar_chart_images),
+                          ("Date/Time Column Visualizations", time_series_images)):
+        buffer, p = new_section()
+        if draw_rendered(p, images):
+            yield title, finish_section(buffer, p)
 
-        # Correlation Heatmap
-        y_position = generate_correlation_heatmap(df, p, y_position)
-        p.showPage()
-        y_position = height - 30
+    # Boxplots for outlier detection
+    if plan['boxplots']:
+        buffer, p = new_section()
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(50, height - 30, "Boxplots for Outlier Detection")
+        draw_rendered(p, boxplot_images)
+        yield "Boxplots for Outlier Detection", finish_section(buffer, p)
 
-        # Correlation Heatmap pairs
-        y_position = generate_correlation_pair_plots(df, p, y_position, threshold=0.5)
-        p.showPage()
-        y_position = height - 30
+def cached_report(reports, cache_key, on_section=None, on_plan=None):
+    """
+    Reassemble a finished report from the report cache: a manifest (plan and
+    section titles) plus one entry per section PDF, replayed through on_plan /
+    on_section like a fresh build. Returns None when any part is missing.
+    """
+    manifest = reports.get(cache_key)
+    if manifest is None:
+        return None
+    try:
+        manifest = json.loads(manifest)
+        plan, titles = report_planner.plan_from_json(manifest["plan"]), manifest["sections"]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Unreadable cached report manifest: {e}")
+        return None
+    keys = [report_cache.report_part_key(cache_key, i) for i in range(len(titles))]
+    if not all(reports.touch(key) for key in keys):
+        return None
+    if on_plan is not None:
+        on_plan(plan)
+    document = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_BYTES)
+    writer = pdf_stream.PdfConcatenator(document)
+    for title, key in zip(titles, keys):
+        section_pdf = reports.get(key)
+        if section_pdf is None:
+            print(f"Cached report section '{title}' was evicted; rebuilding.")
+            document.close()
+            return None
+        writer.add(section_pdf)
+        if on_section is not None:
+            on_section(title, section_pdf)
+    writer.close()
+    document.seek(0)
+    return document
 
-        generate_histograms(df[column_types['numeric']], p)
-        p.showPage()
+def process_file(file, sample_size=None, workers=None, corr_float32=False, use_cache=True,
+                 output_mode="png", jpeg_quality=DEFAULT_JPEG_QUALITY, palette_colors=0,
+                 on_section=None, profile=None, time_budget=None, page_budget=None, on_plan=None,
+                 heatmap_block="correlation"):
+    """
+    Build the PDF report from a single streaming pass over the CSV (see
+    profile_csv); the full file is never held in memory. `workers` sets the
+    number of chart-rendering processes (None = CPU count - 1, capped; 0 or 1 =
+    render in-process); the pool is shared across reports (shared_render_pool)
+    and small reports skip it. `corr_float32` accumulates the correlation in single precision.
+    With `use_cache`, a finished report for the same file contents and options is
+    reassembled from its cached sections (cached_report), and unchanged charts
+    are reused (report_cache).
+    `output_mode` picks how charts are embedded (see OUTPUT_MODES / chart_output).
+    Sections are appended to the output PDF as they finish (pdf_stream);
+    `on_section(title, pdf_bytes)` is called with each one, so callers can
+    offer the summary and heatmap long before the last chart is drawn.
+    A `profile` from profile_csv (same sample_size / corr_float32) skips the
+    profiling pass. `time_budget` (seconds) / `page_budget` limit the per-column
+    charts (see report_planner); `on_plan(plan)` receives the chosen plan.
+    `heatmap_block` picks how a wide correlation heatmap chooses its columns
+    (HEATMAP_BLOCK_RANKINGS).
+    Returns the PDF as a file object at position 0 (spooled to a temp file
+    beyond REPORT_SPOOL_BYTES), or (None, error).
+    """
+    output = chart_output(output_mode, jpeg_quality, palette_colors)
+    workers = default_render_workers() if workers is None else workers
+    reports = sections = cache_key = None
+    if use_cache:
+        try:
+            reports, sections = report_cache.report_cache(), report_cache.section_cache()
+        except OSError as e:
+            print(f"Report cache unavailable, building without it: {e}")
+            use_cache = False
+    if use_cache:
+        cache_key = report_cache.report_key(report_cache.dataset_hash(file),
+                                            sample_size=sample_size, corr_float32=corr_float32,
+                                            output=output, time_budget=time_budget, page_budget=page_budget,
+                                            heatmap_block=heatmap_block,
+                                            workers=workers if time_budget is not None else None)
+        cached = cached_report(reports, cache_key, on_section, on_plan)
+        if cached is not None:
+            return cached
 
-        generate_bar_charts(df[column_types['categorical']], p)
-        p.showPage()
+    if profile is None:
+        profile, error = profile_csv(file, sample_size, float32=corr_float32)
+        if error:
+            return None, error
 
-        generate_time_series(df[column_types['datetime']], p)
-        p.showPage()
+    document = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_BYTES)
+    try:
+        pool = shared_render_pool(workers)
+        plans = []
 
-        # Boxplots for outlier detection
-        if column_types['numeric']:
-            p.setFont("Helvetica-Bold", 14)
-            p.drawString(50, y_position, "Boxplots for Outlier Detection")
-            y_position -= 30
-            generate_boxplots(df[column_types['numeric']], p)
-            y_position = height - 30
+        def keep_plan(plan):
+            plans.append(plan)
+            if on_plan is not None:
+                on_plan(plan)
 
-        p.save()
-        buffer.seek(0)
-        return buffer
+        writer = pdf_stream.PdfConcatenator(document)
+        titles = []
+        for title, section_pdf in report_sections(profile, pool, sections, output, time_budget,
+                                                  page_budget, workers, keep_plan, heatmap_block):
+            writer.add(section_pdf)
+            if reports is not None:
+                reports.put(report_cache.report_part_key(cache_key, len(titles)), section_pdf)
+            titles.append(title)
+            if on_section is not None:
+                on_section(title, section_pdf)
+        writer.close()
+
+        # The manifest goes in last, so a cached report never lists a section that was not written
+        if reports is not None:
+            manifest = {"plan": report_planner.plan_to_json(plans[0]), "sections": titles}
+            reports.put(cache_key, json.dumps(manifest, default=str).encode("utf-8"))
+        document.seek(0)
+        return document
 
     except Exception as e:
         print(f"An error occurred: {e}")
+        document.close()
+        if isinstance(e, BrokenProcessPool):
+            reset_render_pool()
 
         return None, f"Processing error: {e}"
 
-
+def benchmark_output_modes(file, outputs=None, **options):
+    """
+    Build the report once per output setting (cache bypassed) and return a
+    DataFrame with the PDF size and build time of each.
+    """
+    if outputs is None:
+        outputs = [chart_output("png"), chart_output("vector"),
+                   chart_output("compressed", DEFAULT_JPEG_QUALITY), chart_output("compressed", palette_colors=64)]
+    rows = []
+    for mode, quality, palette_colors in outputs:
+        start = time.perf_counter()
+        result = process_file(file, use_cache=False, output_mode=mode, jpeg_quality=quality,
+                              palette_colors=palette_colors, **options)
+        elapsed = time.perf_counter() - start
+        if isinstance(result, tuple):
+            print(f"Benchmark failed for {mode}: {result}")
+            continue
+        with result:
+            size = result.seek(0, os.SEEK_END)
+        rows.append({
+            "mode": mode,
+            "quality": quality if mode == "compressed" and not palette_colors else None,
+            "palette colors": palette_colors or None,
+            "size (MB)": round(size / 1e6, 3),
+            "time (s)": round(elapsed, 2),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,106 @@
+import re
+
+# Minimal streaming concatenation of the single-revision PDFs written by
+# reportlab: each part's objects are renumbered and copied to the output as
+# soon as the part arrives, so only one part is ever held in memory.
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_OBJ_HEADER = re.compile(rb"\s*(\d+) 0 obj")
+_REFERENCE = re.compile(rb"(?<![\w.])(\d+) 0 R\b")
+_STREAM = re.compile(rb"\bstream\r?\n")
+_ROOT = re.compile(rb"/Root (\d+) 0 R")
+_PAGES = re.compile(rb"/Pages (\d+) 0 R")
+_KIDS = re.compile(rb"/Kids \[([^\]]*)\]")
+
+CATALOG_OBJ = 1
+PAGES_OBJ = 2
+
+
+def _xref_offsets(data):
+    """{object number: byte offset} from the cross-reference table of a PDF."""
+    match = _STARTXREF.search(data[-64:])
+    if match is None:
+        raise ValueError("Not a single-revision PDF: startxref not found.")
+    xref_start = int(match.group(1))
+    lines = data[xref_start:].split(b"\n", 2)
+    if lines[0].strip() != b"xref":
+        raise ValueError("Unsupported PDF: cross-reference streams are not handled.")
+    first, count = (int(v) for v in lines[1].split())
+    offsets = {}
+    for i, entry in enumerate(_XREF_ENTRY.finditer(lines[2][:count * 20])):
+        if entry.group(3) == b"n":
+            offsets[first + i] = int(entry.group(1))
+    return offsets, xref_start
+
+
+class PdfConcatenator:
+    """
+    Write several PDFs (reportlab output) to `out` as one document.
+    add() copies a part's objects immediately; close() writes the page tree,
+    catalog, cross-reference table and trailer.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.pages = []
+        self.next_obj = PAGES_OBJ + 1
+        self.position = 0
+        self._write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def add(self, data):
+        offsets, xref_start = _xref_offsets(data)
+        root = int(_ROOT.search(data[xref_start:]).group(1))
+        ordered = sorted(offsets.items(), key=lambda item: item[1])
+        bounds = {num: (start, ordered[i + 1][1] if i + 1 < len(ordered) else xref_start)
+                  for i, (num, start) in enumerate(ordered)}
+
+        catalog = data[slice(*bounds[root])]
+        pages_root = int(_PAGES.search(catalog).group(1))
+        pages_tree = data[slice(*bounds[pages_root])]
+        kids = [int(num) for num in _REFERENCE.findall(_KIDS.search(pages_tree).group(1))]
+
+        # Old page tree points at the merged one; everything else gets a fresh number
+        mapping = {root: CATALOG_OBJ, pages_root: PAGES_OBJ}
+        for num in offsets:
+            if num not in mapping:
+                mapping[num] = self.next_obj
+                self.next_obj += 1
+
+        def renumber(match):
+            return b"%d 0 R" % mapping.get(int(match.group(1)), 0)
+
+        for num, (start, end) in bounds.items():
+            if num in (root, pages_root):
+                continue
+            obj = data[start:end]
+            header = _OBJ_HEADER.match(obj)
+            body = obj[header.end():]
+            stream = _STREAM.search(body)
+            head, tail = (body[:stream.start()], body[stream.start():]) if stream else (body, b"")
+            self.offsets[mapping[num]] = self.position
+            self._write(b"%d 0 obj" % mapping[num] + _REFERENCE.sub(renumber, head) + tail)
+        self.pages.extend(mapping[num] for num in kids)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % num for num in self.pages)
+        self.offsets[PAGES_OBJ] = self.position
+        self._write(b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [ %s ] >>\nendobj\n"
+                    % (PAGES_OBJ, len(self.pages), kids))
+        self.offsets[CATALOG_OBJ] = self.position
+        self._write(b"%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n" % (CATALOG_OBJ, PAGES_OBJ))
+
+        xref_start = self.position
+        size = self.next_obj
+        entries = [b"0000000000 65535 f \n"]
+        for num in range(1, size):
+            offset = self.offsets.get(num)
+            entries.append(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+        self._write(b"xref\n0 %d\n" % size + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (size, CATALOG_OBJ, xref_start))
@@ -0,0 +1,783 @@
+import numpy as np
+import pandas as pd
+
+pd.options.mode.copy_on_write = True
+
+SAMPLE_ROWS = 10_000           # bounded uniform row sample (KDE, boxplots, pair plots)
+HISTOGRAM_MAX_BINS = 1024      # fine bins kept per numeric column
+VALUE_TRACK_CAP = 10_000       # distinct values tracked per categorical column
+SMALL_INT_DOMAIN = 20          # integer columns with fewer values get count bars
+HLL_PRECISION = 14             # 2**14 registers: ~0.8% relative standard error
+EXACT_DISTINCT_LIMIT = 50_000  # distinct counts stay exact up to this many values
+TIME_BUCKETS_MAX = 120         # finest time granularity with at most this many buckets wins
+NULL_MASK_ROWS = 65_536        # rows turned into a packed null mask at a time (multiple of 64)
+NULLITY_BLOCKS = 256           # row blocks kept for the downsampled nullity matrix
+ASSOCIATION_TOP_K = 20         # codes per column in contingency tables (top values + "other")
+ASSOCIATION_MAX_COLUMNS = 50   # object columns paired for Cramer's V (fewest distinct values first)
+ASSOCIATION_BATCH_CELLS = 4_000_000  # rows x pairs coded per np.bincount call
+
+HOUR_NS = 3_600_000_000_000
+DAY_NS = 24 * HOUR_NS
+# Approximate bucket widths, only used to pick a granularity from a range
+GRANULARITY_NS = {"hour": HOUR_NS, "day": DAY_NS, "week": 7 * DAY_NS,
+                  "month": 30.44 * DAY_NS, "year": 365.25 * DAY_NS}
+
+
+def classify_object_column(distinct, rows):
+    """Categorical vs text from the distinct/rows ratio."""
+    return 'categorical' if distinct / max(1, rows) < 0.5 else 'text'
+
+
+def hash_values(series):
+    """64-bit hashes of the non-null values of a Series."""
+    # categorize=False: hash every value directly instead of factorizing first
+    series = series.dropna()
+    try:
+        return pd.util.hash_pandas_object(series, index=False, categorize=False).to_numpy()
+    except (TypeError, ValueError):  # unhashable objects (lists, tuples): hash their text
+        return pd.util.hash_pandas_object(series.astype(str), index=False, categorize=False).to_numpy()
+
+
+def approx_distinct(series, limit=EXACT_DISTINCT_LIMIT):
+    """Distinct non-null values: exact nunique for short series, HyperLogLog above `limit` rows."""
+    if len(series) <= limit:
+        return series.nunique()
+    counter = DistinctCounter(limit)
+    counter.update(series)
+    return counter.estimate()
+
+
+# =========================
+# MERGEABLE ACCUMULATORS
+# =========================
+class Moments:
+    """Count / mean / M2 / min / max. Chunks are combined with Chan's parallel Welford update."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        chunk = Moments()
+        chunk.n = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+
+class StreamingHistogram:
+    """
+    Exact counts on power-of-two-width bins aligned at zero. When the value range
+    outgrows `max_bins` the width doubles and neighbouring bins merge, so memory is
+    bounded and any two histograms can be merged.
+    """
+
+    def __init__(self, max_bins=HISTOGRAM_MAX_BINS):
+        self.max_bins = max_bins
+        self.exponent = None
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def width(self):
+        return 2.0 ** self.exponent
+
+    def _coarsen(self, exponent):
+        shift = exponent - self.exponent
+        if shift <= 0:
+            return
+        if len(self.counts):
+            idx = np.arange(self.offset, self.offset + len(self.counts), dtype=np.int64) >> shift
+            new_offset = int(idx[0])
+            self.counts = np.bincount(idx - new_offset, weights=self.counts).astype(np.int64)
+            self.offset = new_offset
+        else:
+            self.offset >>= shift
+        self.exponent = exponent
+
+    def _fit_range(self, low, high):
+        """Coarsen until [low, high] (plus the existing bins) fits in max_bins."""
+        if len(self.counts):
+            low = min(low, self.offset * self.width)
+            high = max(high, (self.offset + len(self.counts)) * self.width)
+        exponent = self.exponent
+        span = high - low
+        if span > 0:
+            exponent = max(exponent, int(np.ceil(np.log2(span / (self.max_bins - 1)))))
+        while np.floor(high / 2.0 ** exponent) - np.floor(low / 2.0 ** exponent) + 1 > self.max_bins:
+            exponent += 1
+        self._coarsen(exponent)
+
+    def _add(self, idx, weights):
+        lo = int(idx.min())
+        hi = int(idx.max())
+        if len(self.counts) == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + len(self.counts) - 1)
+        if new_lo != self.offset or new_hi != self.offset + len(self.counts) - 1:
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            grown[self.offset - new_lo:self.offset - new_lo + len(self.counts)] = self.counts
+            self.counts, self.offset = grown, new_lo
+        self.counts += np.bincount(idx - self.offset, weights=weights, minlength=len(self.counts)).astype(np.int64)
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        low, high = float(values.min()), float(values.max())
+        if self.exponent is None:
+            span = high - low
+            scale = span / (self.max_bins // 2) if span > 0 else max(abs(low), 1.0) / self.max_bins
+            self.exponent = int(np.floor(np.log2(scale)))
+        self._fit_range(low, high)
+        idx = np.floor(values / self.width).astype(np.int64)
+        self._add(idx, None)
+
+    def merge(self, other):
+        if other.exponent is None or not len(other.counts):
+            return
+        if self.exponent is None:
+            self.exponent = other.exponent
+        self._coarsen(max(self.exponent, other.exponent))
+        other_idx = np.arange(other.offset, other.offset + len(other.counts), dtype=np.int64)
+        idx = other_idx >> (self.exponent - other.exponent)
+        self._fit_range(idx.min() * self.width, (idx.max() + 0.5) * self.width)
+        self._add(other_idx >> (self.exponent - other.exponent), other.counts)
+
+    def rebin(self, bins, low, high):
+        """Counts on `bins` equal-width display bins over [low, high]."""
+        edges = np.linspace(low, high, bins + 1)
+        if not len(self.counts):
+            return np.zeros(bins, dtype=np.int64), edges
+        centers = (np.arange(self.offset, self.offset + len(self.counts)) + 0.5) * self.width
+        centers = np.clip(centers, low, high)
+        counts, _ = np.histogram(centers, bins=edges, weights=self.counts)
+        return counts.astype(np.int64), edges
+
+
+class ValueCounter:
+    """
+    Value counts merged chunk by chunk. Beyond `cap` distinct values only the
+    heaviest are kept (and `overflow` is set), so memory stays bounded.
+    """
+
+    def __init__(self, cap=VALUE_TRACK_CAP):
+        self.cap = cap
+        self.counts = pd.Series(dtype="float64")
+        self.overflow = False
+
+    def update(self, series):
+        chunk_counts = series.value_counts()
+        if len(self.counts):
+            self.counts = self.counts.add(chunk_counts, fill_value=0)
+        else:
+            self.counts = chunk_counts.astype("float64")
+        if self.cap is not None and len(self.counts) > self.cap:
+            self.counts = self.counts.nlargest(self.cap)
+            self.overflow = True
+
+    @property
+    def distinct(self):
+        """Exact distinct count unless `overflow` (then a lower bound)."""
+        return len(self.counts)
+
+    def top(self, k):
+        return self.counts.nlargest(k).astype("int64")
+
+    def sorted_counts(self):
+        return self.counts.sort_index().astype("int64")
+
+
+def datetime_ns(series):
+    """int64 nanoseconds since the epoch of the non-null values (tz-aware: local wall time)."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    values = series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return values[values != np.iinfo(np.int64).min]  # NaT
+
+
+def choose_granularity(span_ns, max_buckets=TIME_BUCKETS_MAX):
+    """Finest of hour/day/week/month/year giving at most `max_buckets` buckets over `span_ns`."""
+    for granularity, width in GRANULARITY_NS.items():
+        if span_ns / width < max_buckets:
+            return granularity
+    return "year"
+
+
+class TimeBuckets:
+    """
+    Record counts per time bucket, by integer division of the int64 nanoseconds.
+    Counts are kept per hour while the observed range is short enough for hourly
+    buckets and per day after that; counts() then folds them into the display
+    granularity chosen from the final range. Memory is bounded by the number of
+    distinct days, and any two accumulators can be merged.
+    """
+
+    def __init__(self, max_buckets=TIME_BUCKETS_MAX):
+        self.max_buckets = max_buckets
+        self.unit = HOUR_NS
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.low = None
+        self.high = None
+
+    def _add(self, keys, counts):
+        keys = np.concatenate([self.keys, keys])
+        counts = np.concatenate([self.counts, counts])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.int64)
+
+    def _fit_range(self, low, high):
+        self.low = low if self.low is None else min(self.low, low)
+        self.high = high if self.high is None else max(self.high, high)
+        if self.unit == HOUR_NS and choose_granularity(self.high - self.low, self.max_buckets) != "hour":
+            self.unit = DAY_NS
+            self.keys, inverse = np.unique(self.keys // 24, return_inverse=True)
+            self.counts = np.bincount(inverse, weights=self.counts).astype(np.int64)
+
+    def update(self, series):
+        values = datetime_ns(series)
+        if len(values) == 0:
+            return
+        self._fit_range(int(values.min()), int(values.max()))
+        keys, counts = np.unique(values // self.unit, return_counts=True)
+        self._add(keys, counts)
+
+    def merge(self, other):
+        if other.low is None:
+            return
+        self._fit_range(other.low, other.high)
+        keys = other.keys // 24 if other.unit == HOUR_NS and self.unit == DAY_NS else other.keys
+        self._add(keys, other.counts)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def granularity(self):
+        return choose_granularity(self.high - self.low, self.max_buckets) if self.low is not None else "month"
+
+    def date_range(self):
+        return (pd.Timestamp(self.low), pd.Timestamp(self.high)) if self.low is not None else None
+
+    def bucket_counts(self, granularity=None):
+        """
+        Counts per bucket from the first to the last bucket (empty ones included),
+        indexed by bucket start. Weeks start on Monday.
+        """
+        granularity = granularity or self.granularity()
+        if not len(self.keys):
+            return pd.Series(dtype="int64", index=pd.DatetimeIndex([]), name=granularity)
+        if granularity == "hour":
+            if self.unit != HOUR_NS:
+                raise ValueError("Hourly counts are only kept for short ranges.")
+            buckets, unit = self.keys, "h"
+        else:
+            days = self.keys * self.unit // DAY_NS
+            if granularity == "day":
+                buckets, unit = days, "D"
+            elif granularity == "week":
+                # 1970-01-01 is a Thursday: shift by 3 days so weeks start on Monday
+                buckets, unit = (days + 3) // 7 * 7 - 3, "D"
+            else:
+                unit = "M" if granularity == "month" else "Y"
+                buckets = days.astype("datetime64[D]").astype(f"datetime64[{unit}]").view(np.int64)
+        step = 7 if granularity == "week" else 1
+        first = int(buckets[0])
+        counts = np.bincount((buckets - first) // step, weights=self.counts).astype(np.int64)
+        starts = (first + step * np.arange(len(counts))).astype(f"datetime64[{unit}]")
+        return pd.Series(counts, index=pd.DatetimeIndex(starts.astype("datetime64[ns]")), name=granularity)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch over 64-bit hashes: 2**precision one-byte registers,
+    relative standard error 1.04 / sqrt(2**precision). Sketches merge with a
+    register-wise max, so chunks can be counted independently.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        tail_bits = 64 - self.precision
+        idx = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+        tail = (hashes & np.uint64((1 << tail_bits) - 1)).astype(np.float64)  # exact below 2**53
+        rank = (tail_bits - np.frexp(tail)[1] + 1).astype(np.uint8)          # leading zeros + 1
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+
+class DistinctCounter:
+    """
+    Distinct count merged chunk by chunk. Exact (a set of value hashes) until
+    more than `limit` distinct values are seen, then a HyperLogLog estimate.
+    """
+
+    def __init__(self, limit=EXACT_DISTINCT_LIMIT, precision=HLL_PRECISION):
+        self.limit = limit
+        self.sketch = HyperLogLog(precision)
+        self.hashes = np.zeros(0, dtype=np.uint64)
+
+    @property
+    def exact(self):
+        return self.hashes is not None
+
+    def update(self, series):
+        hashes = hash_values(series)
+        self.sketch.update_hashes(hashes)
+        if self.exact:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > self.limit:
+                self.hashes = None
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        if self.exact and other.exact:
+            self.hashes = np.union1d(self.hashes, other.hashes)
+            if len(self.hashes) > self.limit:
+                self.hashes = None
+        else:
+            self.hashes = None
+
+    def estimate(self):
+        return len(self.hashes) if self.exact else self.sketch.estimate()
+
+
+def popcount(words):
+    """Set bits per element of an unsigned integer array."""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words)
+    bytes_ = words.view(np.uint8).reshape(words.shape + (words.itemsize,))
+    return _POPCOUNT_TABLE[bytes_].sum(axis=-1, dtype=np.uint8)
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class NullMask:
+    """
+    Missing-value structure from bit-packed null masks. Every NULL_MASK_ROWS
+    rows the mask is packed (np.packbits, one bit per row and column) and only
+    the packed words are used: null counts per column, both-null counts per
+    column pair (popcount of AND), and null counts per row block for a
+    downsampled nullity matrix. The block size doubles whenever more than
+    `max_blocks` blocks would be needed, so memory is bounded in the row count.
+    Block edges are exact when chunks are a multiple of 64 rows; otherwise a
+    64-row word may be counted in the neighbouring block.
+    """
+
+    def __init__(self, columns, max_blocks=NULLITY_BLOCKS):
+        self.columns = list(columns)
+        self.max_blocks = max_blocks
+        k = len(self.columns)
+        self.rows = 0
+        self.counts = np.zeros(k, dtype=np.int64)
+        self.both = np.zeros((k, k), dtype=np.int64)
+        self.block_rows = 64
+        self.blocks = np.zeros((k, 0), dtype=np.int64)
+
+    def _fit_rows(self, rows):
+        while -(-rows // self.block_rows) > self.max_blocks:
+            if self.blocks.shape[1] % 2:
+                self.blocks = np.pad(self.blocks, ((0, 0), (0, 1)))
+            self.blocks = self.blocks.reshape(len(self.columns), -1, 2).sum(axis=2)
+            self.block_rows *= 2
+        needed = -(-rows // self.block_rows)
+        if needed > self.blocks.shape[1]:
+            self.blocks = np.pad(self.blocks, ((0, 0), (0, needed - self.blocks.shape[1])))
+
+    def _add_packed(self, words, rows):
+        """`words`: (columns, n) uint64 packed null bits of the next `rows` rows."""
+        bits = popcount(words).astype(np.int64)
+        self.counts += bits.sum(axis=1)
+        # Both-null counts only among the columns with nulls in these rows
+        present = np.flatnonzero(bits.any(axis=1))
+        for n, i in enumerate(present):
+            self.both[i, present[n:]] += popcount(words[i] & words[present[n:]]).sum(axis=1, dtype=np.int64)
+        # Words are 64 rows each and blocks are whole multiples of 64 rows
+        start = self.rows
+        self._fit_rows(start + rows)
+        block_of_word = (start + 64 * np.arange(words.shape[1])) // self.block_rows
+        bounds = np.flatnonzero(np.diff(block_of_word, prepend=-1))
+        self.blocks[:, block_of_word[bounds]] += np.add.reduceat(bits, bounds, axis=1)
+        self.rows += rows
+
+    def update(self, chunk):
+        for start in range(0, len(chunk), NULL_MASK_ROWS):
+            mask = chunk.iloc[start:start + NULL_MASK_ROWS].isna().to_numpy()
+            packed = np.packbits(mask.T, axis=1)
+            pad = -packed.shape[1] % 8
+            if pad:
+                packed = np.pad(packed, ((0, 0), (0, pad)))
+            self._add_packed(packed.view(np.uint64), len(mask))
+
+    def null_counts(self):
+        return pd.Series(self.counts, index=self.columns, dtype="int64")
+
+    def nullity_matrix(self):
+        """Missing fraction per (row block, column), row blocks in file order."""
+        used = -(-self.rows // self.block_rows) if self.rows else 0
+        sizes = np.full(used, self.block_rows, dtype=float)
+        if used:
+            sizes[-1] = self.rows - (used - 1) * self.block_rows
+        fractions = self.blocks[:, :used].T / sizes[:, None] if used else np.zeros((0, len(self.columns)))
+        index = pd.RangeIndex(0, used * self.block_rows, self.block_rows, name="first row")
+        return pd.DataFrame(fractions, index=index, columns=self.columns)
+
+    def co_missingness(self):
+        """
+        Correlation of the null indicators (phi coefficient) between the columns
+        that are neither complete nor entirely empty.
+        """
+        keep = np.flatnonzero((self.counts > 0) & (self.counts < self.rows))
+        both = np.triu(self.both) + np.triu(self.both, 1).T
+        both = both[np.ix_(keep, keep)].astype(float)
+        counts = self.counts[keep].astype(float)
+        n = float(self.rows)
+        cov = n * both - np.outer(counts, counts)
+        spread = np.sqrt(counts * (n - counts))
+        corr = cov / np.outer(spread, spread)
+        labels = [self.columns[i] for i in keep]
+        return pd.DataFrame(np.clip(corr, -1, 1), index=labels, columns=labels)
+
+
+class CovarianceAccumulator:
+    """
+    Running pairwise-complete co-moment sums for a correlation matrix.
+    Values are shifted by the first chunk's means to keep the sums well conditioned.
+    """
+
+    def __init__(self, columns, float32=False):
+        self.columns = list(columns)
+        self.dtype = np.float32 if float32 else np.float64
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k), dtype=self.dtype)
+        self.sx = np.zeros((k, k), dtype=self.dtype)
+        self.sxx = np.zeros((k, k), dtype=self.dtype)
+        self.sxy = np.zeros((k, k), dtype=self.dtype)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        valid = ~np.isnan(values)
+        if self.shift is None:
+            counts = valid.sum(axis=0)
+            sums = np.where(valid, values, 0).sum(axis=0)
+            self.shift = np.divide(sums, counts, out=np.zeros(len(counts), dtype=self.dtype), where=counts > 0)
+        x = np.where(valid, values - self.shift, 0).astype(self.dtype)
+        m = valid.astype(self.dtype)
+        self.n += m.T @ m
+        self.sx += x.T @ m
+        self.sxx += (x * x).T @ m
+        self.sxy += x.T @ x
+
+    def _pairwise(self):
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy - self.sx * self.sx.T / n
+            var_x = self.sxx - self.sx * self.sx / n
+        return n, cov, var_x
+
+    def correlation(self):
+        n, cov, var_x = self._pairwise()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.sqrt(var_x * var_x.T)
+        corr[n < 2] = np.nan
+        corr = np.clip(corr, -1, 1)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def regression(self, x_col, y_col):
+        """(slope, intercept) of the least-squares line y ~ x over rows where both are present."""
+        i, j = self.columns.index(x_col), self.columns.index(y_col)
+        n, cov, var_x = self._pairwise()
+        if n[i, j] < 2 or var_x[i, j] == 0:
+            return None
+        slope = float(cov[i, j] / var_x[i, j])
+        mean_x = float(self.shift[i] + self.sx[i, j] / n[i, j])
+        mean_y = float(self.shift[j] + self.sx[j, i] / n[i, j])
+        return slope, mean_y - slope * mean_x
+
+
+class ContingencyAccumulator:
+    """
+    Contingency tables of every pair of object columns, for Cramer's V. Each
+    column keeps the `top_k` - 1 most frequent values of the first chunk and
+    maps every other value to one "other" code, so tables are at most
+    top_k x top_k. A chunk is coded once as integers and all pairs are counted
+    together by np.bincount over combined (pair, code, code) indices; rows
+    where either value is missing land in a separate code that is ignored.
+    """
+
+    def __init__(self, top_k=ASSOCIATION_TOP_K, max_columns=ASSOCIATION_MAX_COLUMNS):
+        self.top_k = top_k
+        self.max_columns = max_columns
+        # Empty until the first chunk: a dataset without object columns never fits
+        self.fitted = False
+        self.columns = []
+        self.vocab = {}
+        self.pairs = np.empty((0, 2), dtype=np.int64)
+        self.tables = np.zeros((0, top_k + 1, top_k + 1), dtype=np.int64)
+
+    def _fit(self, chunk):
+        distinct = chunk.nunique()
+        kept = set(distinct.nsmallest(self.max_columns).index)
+        self.columns = [col for col in chunk.columns if col in kept]
+        self.vocab = {col: chunk[col].value_counts().index[:self.top_k - 1] for col in self.columns}
+        first, second = np.triu_indices(len(self.columns), 1)
+        self.pairs = np.column_stack([first, second]).astype(np.int64)
+        codes = self.top_k + 1  # top values, "other", missing
+        self.tables = np.zeros((len(self.pairs), codes, codes), dtype=np.int64)
+        self.fitted = True
+
+    def _codes(self, chunk):
+        codes = np.empty((len(chunk), len(self.columns)), dtype=np.int64)
+        for n, col in enumerate(self.columns):
+            series = chunk[col]
+            column_codes = pd.Categorical(series, categories=self.vocab[col]).codes.astype(np.int64)
+            column_codes[column_codes < 0] = self.top_k - 1
+            column_codes[series.isna().to_numpy()] = self.top_k
+            codes[:, n] = column_codes
+        return codes
+
+    def update(self, chunk):
+        if not self.fitted:
+            self._fit(chunk)
+        if not len(self.pairs) or not len(chunk):
+            return
+        codes = self._codes(chunk)
+        width = self.top_k + 1
+        cells = width * width
+        batch = max(1, ASSOCIATION_BATCH_CELLS // len(chunk))
+        for start in range(0, len(self.pairs), batch):
+            pairs = self.pairs[start:start + batch]
+            combined = codes[:, pairs[:, 0]] * width + codes[:, pairs[:, 1]] + np.arange(len(pairs)) * cells
+            counts = np.bincount(combined.ravel(), minlength=len(pairs) * cells)
+            self.tables[start:start + len(pairs)] += counts.reshape(len(pairs), width, width)
+
+    def cramers_v(self, columns=None):
+        """Cramer's V of every tracked pair among `columns` (default: all tracked)."""
+        tracked = self.columns
+        columns = [col for col in (columns if columns is not None else tracked) if col in tracked]
+        k = len(tracked)
+        matrix = np.full((k, k), np.nan)
+        if len(self.pairs):
+            observed = self.tables[:, :self.top_k, :self.top_k].astype(float)  # drop the missing code
+            n = observed.sum(axis=(1, 2))
+            row_sums = observed.sum(axis=2)
+            col_sums = observed.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                expected = row_sums[:, :, None] * col_sums[:, None, :] / n[:, None, None]
+                chi2 = np.where(expected > 0, (observed - expected) ** 2 / expected, 0).sum(axis=(1, 2))
+                dof = np.minimum((row_sums > 0).sum(axis=1), (col_sums > 0).sum(axis=1)) - 1
+                v = np.sqrt(chi2 / n / dof)
+            v[(n == 0) | (dof < 1)] = np.nan
+            matrix[self.pairs[:, 0], self.pairs[:, 1]] = v
+            matrix[self.pairs[:, 1], self.pairs[:, 0]] = v
+        np.fill_diagonal(matrix, 1.0)
+        matrix = pd.DataFrame(np.clip(matrix, 0, 1), index=tracked, columns=tracked)
+        return matrix.loc[columns, columns]
+
+
+class RowSample:
+    """Uniform sample of at most `size` rows across chunks (bottom-k on random keys)."""
+
+    def __init__(self, size=SAMPLE_ROWS, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.frame = None
+        self.keys = None
+
+    def update(self, chunk):
+        keys = self.rng.random(len(chunk))
+        if self.frame is None:
+            frame, all_keys = chunk.reset_index(drop=True), keys
+        else:
+            frame = pd.concat([self.frame, chunk], ignore_index=True)
+            all_keys = np.concatenate([self.keys, keys])
+        if len(frame) > self.size:
+            keep = np.sort(np.argpartition(all_keys, self.size)[:self.size])
+            frame, all_keys = frame.iloc[keep].reset_index(drop=True), all_keys[keep]
+        self.frame, self.keys = frame, all_keys
+
+
+# =========================
+# DATASET PROFILE
+# =========================
+class DatasetProfile:
+    """
+    Every per-column statistic the report needs, accumulated in one pass over
+    DataFrame chunks. The schema (column_types from the first chunk) fixes how
+    later chunks are coerced; object columns are split into categorical/text
+    only at the end, once distinct counts are known.
+    """
+
+    def __init__(self, column_types, sample_rows=SAMPLE_ROWS, float32=False, seed=0,
+                 datetime_formats=None):
+        self.schema = {key: list(cols) for key, cols in column_types.items()}
+        self.datetime_formats = datetime_formats or {}
+        self.numeric = self.schema['numeric']
+        self.datetime = self.schema['datetime']
+        self.objects = self.schema['categorical'] + self.schema['text']
+        self.columns = None
+        self.rows = 0
+        self.nulls = None
+        self.moments = {col: Moments() for col in self.numeric}
+        self.histograms = {col: StreamingHistogram() for col in self.numeric}
+        self.small_ints = {}
+        self.values = {col: ValueCounter() for col in self.objects}
+        self.distinct = None
+        self.time_counts = {col: TimeBuckets() for col in self.datetime}
+        self.covariance = CovarianceAccumulator(self.numeric, float32=float32)
+        self.associations = ContingencyAccumulator()
+        self.sample = RowSample(sample_rows, seed)
+        # Values that did not match their column's detected type and became missing
+        self.coerced = {col: 0 for col in self.numeric + self.datetime}
+
+    def _count_coerced(self, col, before, after):
+        self.coerced[col] += int((after.isna() & before.notna()).sum())
+
+    def count_coerced(self, raw, converted):
+        """Record the values of `raw` that became missing in `converted` (a typed copy of the chunk)."""
+        for col in self.coerced:
+            if converted[col].dtype != raw[col].dtype:
+                self._count_coerced(col, raw[col], converted[col])
+
+    def _coerce(self, chunk):
+        for col in self.numeric:
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                values = pd.to_numeric(chunk[col], errors='coerce')
+                self._count_coerced(col, chunk[col], values)
+                chunk[col] = values
+        for col in self.datetime:
+            if not pd.api.types.is_datetime64_any_dtype(chunk[col]):
+                fmt = self.datetime_formats.get(col)
+                values = pd.to_datetime(chunk[col], format=fmt or "mixed", errors='coerce')
+                self._count_coerced(col, chunk[col], values)
+                chunk[col] = values
+        return chunk
+
+    def coerced_values(self):
+        """Per-column count of values dropped as not matching the detected type (non-zero only)."""
+        counts = pd.Series(self.coerced, dtype="int64")
+        return counts[counts > 0]
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+            self.nulls = NullMask(self.columns)
+            self.distinct = {col: DistinctCounter() for col in self.columns}
+            self.small_ints = {
+                col: ValueCounter(cap=SMALL_INT_DOMAIN) for col in self.numeric
+                if pd.api.types.is_integer_dtype(chunk[col])
+            }
+        chunk = self._coerce(chunk)
+        self.rows += len(chunk)
+        self.nulls.update(chunk)
+
+        if self.numeric:
+            values = chunk[self.numeric].to_numpy(dtype=float, na_value=np.nan)
+            for i, col in enumerate(self.numeric):
+                self.moments[col].update(values[:, i])
+                self.histograms[col].update(values[:, i])
+            self.covariance.update(values)
+        for col, counter in list(self.small_ints.items()):
+            if not pd.api.types.is_integer_dtype(chunk[col]):
+                del self.small_ints[col]
+                continue
+            counter.update(chunk[col])
+            if counter.overflow:
+                del self.small_ints[col]
+        for col in self.objects:
+            self.values[col].update(chunk[col])
+        if self.objects:
+            self.associations.update(chunk[self.objects])
+        for col in self.columns:
+            self.distinct[col].update(chunk[col])
+        for col in self.datetime:
+            self.time_counts[col].update(chunk[col])
+        self.sample.update(chunk)
+        return self
+
+    @classmethod
+    def from_frame(cls, df, column_types, **kwargs):
+        """Profile of an in-memory frame (a single chunk)."""
+        return cls(column_types, **kwargs).update(df)
+
+    # ---- Results ----
+    def column_types(self):
+        column_types = {key: list(cols) for key, cols in self.schema.items()}
+        column_types['categorical'] = []
+        column_types['text'] = []
+        for col in self.objects:
+            kind = classify_object_column(self.distinct[col].estimate(), self.rows)
+            column_types[kind].append(col)
+        return column_types
+
+    def distinct_counts(self):
+        """Per-column (distinct count, exact?) pairs."""
+        return {col: (counter.estimate(), counter.exact) for col, counter in self.distinct.items()}
+
+    @property
+    def null_counts(self):
+        return self.nulls.null_counts()
+
+    def missing_pct(self):
+        return 100 * self.null_counts / max(1, self.rows)
+
+    def correlation(self):
+        return self.covariance.correlation()
+
+    def variances(self):
+        """Sample variance of each numeric column."""
+        return pd.Series({col: moments.std ** 2 for col, moments in self.moments.items()}, dtype=float)
+
+    def association(self):
+        """Cramer's V between the categorical columns."""
+        return self.associations.cramers_v(self.column_types()['categorical'])
+
+    def sample_values(self, col):
+        return self.sample.frame[col].dropna()
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Per-user default, so another account on a shared /tmp cannot claim the name first
+CACHE_ROOT = os.environ.get("REPORT_CACHE_DIR", os.path.join(
+    tempfile.gettempdir(), f"csv_report_cache_{os.getuid()}" if hasattr(os, "getuid") else "csv_report_cache"))
+REPORT_CACHE_BYTES = 256 * 1024 * 1024    # finished PDF reports
+SECTION_CACHE_BYTES = 256 * 1024 * 1024   # rendered chart PNGs
+CACHE_FORMAT_VERSION = 7                  # bump when rendering output changes
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# =========================
+# KEYS
+# =========================
+def dataset_hash(file):
+    """BLAKE2b of the file contents (path or file-like object; the pointer is rewound)."""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    else:
+        file.seek(0)
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+        file.seek(0)
+    return digest.hexdigest()
+
+
+def report_key(data_hash, **options):
+    """Cache key for a finished report: dataset hash + every option that changes the output."""
+    text = repr((CACHE_FORMAT_VERSION, data_hash, sorted(options.items())))
+    return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+
+def report_part_key(report_key, index):
+    """Cache key for the `index`-th section PDF of a cached report."""
+    return f"{report_key}-{index}"
+
+
+def section_key(job):
+    """Cache key for one chart job (kind, label, aggregate data, title)."""
+    payload = pickle.dumps((CACHE_FORMAT_VERSION, job), protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+# =========================
+# DISK CACHE
+# =========================
+def private_dir(path):
+    """
+    Create `path` readable by this user only, or check an existing one. Cache
+    entries are trusted on read, so a directory owned by another user (or a
+    symlink to one) is refused with PermissionError; group/other access on
+    our own directory is removed.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Cache path is not a directory: {path}")
+    if hasattr(os, "getuid"):
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Cache directory {path} is owned by another user; refusing to use it.")
+        if info.st_mode & 0o077:
+            os.chmod(path, 0o700)
+
+
+class DiskCache:
+    """
+    One file per entry under `directory`, least recently used evicted once the
+    entries exceed `max_bytes`. The directory is scanned once, at creation;
+    after that an in-memory index (key -> size, in LRU order) and a running
+    total are updated on every get / touch / put, so a write costs O(1) plus
+    the evictions. Reads refresh the entry's mtime, so the next scan (a new
+    process) restores the order. Writes go through a temp file + os.replace,
+    so concurrent sessions never see partial entries; entries written by
+    another process are only counted after its next scan.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        private_dir(os.path.dirname(directory))
+        private_dir(directory)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total = 0
+        self._scan()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _scan(self):
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                found.append((info.st_mtime, entry.name, info.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self.evict()
+
+    def _used(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def _forget(self, key):
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self._forget(key)
+            return None
+        self._used(key)
+        return data
+
+    def touch(self, key):
+        """Whether `key` is cached, without reading it; marks it recently used."""
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            self._forget(key)
+            return False
+        self._used(key)
+        return True
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Report cache write error: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._total += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the total fits `max_bytes`."""
+        while True:
+            with self._lock:
+                if self._total <= self.max_bytes or not self._entries:
+                    return
+                key, size = self._entries.popitem(last=False)
+                self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _shared_cache(directory, max_bytes):
+    """One DiskCache per directory and process, so the directory is scanned once."""
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = DiskCache(directory, max_bytes)
+        return cache
+
+
+def report_cache():
+    return _shared_cache(os.path.join(CACHE_ROOT, "reports"), REPORT_CACHE_BYTES)
+
+
+def section_cache():
+    return _shared_cache(os.path.join(CACHE_ROOT, "sections"), SECTION_CACHE_BYTES)
@@ -0,0 +1,205 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Seconds to render one chart (single process, measured on typical charts)
+RENDER_COST_SECONDS = {
+    "histogram": 0.20,
+    "boxplot": 0.10,
+    "bar chart": 0.18,
+    "pair plot": 0.20,
+    "nullity matrix": 0.25,
+}
+TIME_SERIES_COST = (0.15, 0.006)   # base + per time bucket bar
+HEATMAP_COST = (0.20, 0.002, 0.0001)  # base + per annotated / plain cell
+DRAW_COST_SECONDS = 0.01           # placing one image on the canvas
+CHARTS_PER_PAGE = 2
+SUMMARY_LINES_PER_PAGE = 40
+
+# Informativeness = weighted sum of three scores in [0, 1]
+SCORE_WEIGHTS = {"dispersion": 0.4, "completeness": 0.3, "correlation": 0.3}
+
+# Report sections the planner fills, in report order: (plan key, chart kind, column type)
+CHART_SECTIONS = [
+    ("histograms", "histogram", "numeric"),
+    ("bar_charts", "bar chart", "categorical"),
+    ("time_series", "time series", "datetime"),
+    ("boxplots", "boxplot", "numeric"),
+]
+
+
+# =========================
+# COST MODEL
+# =========================
+def chart_cost(kind, size=0, annotated=True):
+    """Estimated seconds to render one chart; `size` is the bar count (time series) or matrix width (heatmap)."""
+    if kind == "time series":
+        base, per_bar = TIME_SERIES_COST
+        return base + per_bar * size
+    if kind == "heatmap":
+        base, per_annotated, per_plain = HEATMAP_COST
+        return base + (per_annotated if annotated else per_plain) * size * size
+    return RENDER_COST_SECONDS[kind]
+
+
+def chart_pages(charts):
+    return math.ceil(charts / CHARTS_PER_PAGE)
+
+
+# =========================
+# INFORMATIVENESS
+# =========================
+def _normalized_entropy(counts):
+    counts = np.asarray(counts, dtype=float)
+    counts = counts[counts > 0]
+    if len(counts) < 2:
+        return 0.0
+    p = counts / counts.sum()
+    return float(-(p * np.log(p)).sum() / np.log(len(p)))
+
+
+def column_scores(profile, column_types):
+    """
+    Informativeness per column, higher is better:
+    - dispersion: std / (|mean| + std) for numeric columns (scale-free, 0 when
+      constant), normalized entropy of the value counts for categorical ones
+    - completeness: 1 - missing fraction
+    - correlation: strongest |corr| with another numeric column, strongest
+      Cramer's V with another categorical column
+    """
+    missing = profile.missing_pct() / 100
+    corr = profile.correlation().abs()
+    strongest = corr.mask(np.eye(len(corr), dtype=bool)).max(axis=1).fillna(0.0)
+    association = profile.association()
+    strongest_association = association.mask(np.eye(len(association), dtype=bool)).max(axis=1).fillna(0.0)
+
+    scores = {}
+    for col in column_types['numeric']:
+        moments = profile.moments[col]
+        spread = moments.std if moments.n > 1 else 0.0
+        dispersion = spread / (abs(moments.mean) + spread) if spread > 0 else 0.0
+        scores[col] = (SCORE_WEIGHTS["dispersion"] * dispersion
+                       + SCORE_WEIGHTS["completeness"] * (1 - missing[col])
+                       + SCORE_WEIGHTS["correlation"] * strongest.get(col, 0.0))
+    for col in column_types['categorical']:
+        dispersion = _normalized_entropy(profile.values[col].counts.to_numpy())
+        scores[col] = (SCORE_WEIGHTS["dispersion"] * dispersion
+                       + SCORE_WEIGHTS["completeness"] * (1 - missing[col])
+                       + SCORE_WEIGHTS["correlation"] * strongest_association.get(col, 0.0))
+    for col in column_types['datetime']:
+        scores[col] = SCORE_WEIGHTS["completeness"] * (1 - missing[col])
+    return pd.Series(scores, dtype=float)
+
+
+# =========================
+# PLANNER
+# =========================
+def plan_report(profile, column_types, correlated_pairs, time_budget=None, page_budget=None, workers=1,
+                heatmap_shapes=None):
+    """
+    Choose which per-column charts fit a time (seconds) and/or page budget.
+    The summary, heatmap and pair plots are always kept; per-column charts are
+    added greedily by informativeness, and anything that does not fit is listed
+    in plan["skipped"] as (section, column, score). Chart lists keep dataset order.
+    plan["budget_exceeded"] is True when even the fixed sections miss the budget
+    (every per-column chart is then skipped).
+    `heatmap_shapes` lists (columns, annotated?) of every heatmap drawn, when known.
+    """
+    scores = column_scores(profile, column_types)
+    workers = max(1, workers)
+
+    # Fixed sections: title, contents, summary, missing values, heatmap, pair plots, associations
+    missing_columns = int((profile.missing_pct() > 0).sum())
+    summary_lines = 12 + len(profile.columns) + missing_columns
+    fixed_pages = 2 + math.ceil(summary_lines / SUMMARY_LINES_PER_PAGE)
+    seconds = 0.0
+    if missing_columns:
+        fixed_pages += 1
+        seconds += chart_cost("nullity matrix")
+    numeric = profile.covariance.columns
+    if numeric:
+        fixed_pages += 1
+    if len(profile.association()) > 1:
+        fixed_pages += 1
+    if heatmap_shapes is None:
+        heatmap_shapes = [(len(numeric), True)] if numeric else []
+    for shown, annotated in heatmap_shapes:
+        seconds += chart_cost("heatmap", shown, annotated)
+    fixed_pages += max(1, chart_pages(len(correlated_pairs)))
+    seconds += len(correlated_pairs) * chart_cost("pair plot")
+
+    def total_pages(counts, skipped):
+        # The skipped charts are listed on their own page(s) after the summary
+        listing = math.ceil((len(skipped) + 2) / SUMMARY_LINES_PER_PAGE) if skipped else 0
+        return fixed_pages + listing + sum(chart_pages(n) for n in counts.values())
+
+    candidates = []
+    for key, kind, column_type in CHART_SECTIONS:
+        for col in column_types[column_type]:
+            size = len(profile.time_counts[col].bucket_counts()) if kind == "time series" else 0
+            # Boxplots rank just below the histogram of the same column
+            priority = scores.get(col, 0.0) - (0.001 if kind == "boxplot" else 0.0)
+            candidates.append((priority, key, col, chart_cost(kind, size) + DRAW_COST_SECONDS))
+    candidates.sort(key=lambda item: -item[0])
+
+    chosen = []
+    skipped = []
+    counts = {key: 0 for key, _, _ in CHART_SECTIONS}
+    for item in candidates:
+        priority, key, col, cost = item
+        counts[key] += 1
+        over_time = time_budget is not None and (seconds + cost) / workers > time_budget
+        over_pages = page_budget is not None and total_pages(counts, skipped) > page_budget
+        if over_time or over_pages:
+            counts[key] -= 1
+            skipped.append(item)
+            continue
+        chosen.append(item)
+        seconds += cost
+
+    # Listing the skipped charts takes pages too: drop the least informative until it fits
+    while page_budget is not None and chosen and total_pages(counts, skipped) > page_budget:
+        item = chosen.pop()
+        counts[item[1]] -= 1
+        seconds -= item[3]
+        skipped.append(item)
+
+    kept = {(key, col) for _, key, col, _ in chosen}
+    plan = {key: [col for col in column_types[column_type] if (key, col) in kept]
+            for key, _, column_type in CHART_SECTIONS}
+    pages = total_pages(counts, skipped)
+    plan.update(
+        skipped=[(key, col, round(float(scores.get(col, 0.0)), 3)) for _, key, col, _ in skipped],
+        scores=scores,
+        estimated_seconds=round(seconds / workers, 1),
+        estimated_pages=pages,
+        budget_exceeded=(page_budget is not None and pages > page_budget)
+                        or (time_budget is not None and seconds / workers > time_budget),
+    )
+    return plan
+
+
+def plan_to_json(plan):
+    """The plan as plain lists and dicts (json.dumps-able); see plan_from_json."""
+    data = dict(plan)
+    data["skipped"] = [list(item) for item in plan["skipped"]]
+    scores = plan["scores"]
+    # (column, score) pairs keep non-string column names intact
+    data["scores"] = None if scores is None else [[col, float(score)] for col, score in scores.items()]
+    return data
+
+
+def plan_from_json(data):
+    """Rebuild a plan stored with plan_to_json."""
+    plan = dict(data)
+    plan["skipped"] = [tuple(item) for item in data["skipped"]]
+    if data["scores"] is not None:
+        plan["scores"] = pd.Series(dict((col, score) for col, score in data["scores"]), dtype=float)
+    return plan
+
+
+def full_plan(column_types):
+    """Plan that keeps every chart (no budget)."""
+    plan = {key: list(column_types[column_type]) for key, _, column_type in CHART_SECTIONS}
+    plan.update(skipped=[], scores=None, estimated_seconds=None, estimated_pages=None, budget_exceeded=False)
+    return plan
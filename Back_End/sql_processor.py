@@ -0,0 +1,1084 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import csv
+import hashlib
+import io
+import itertools
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import DateTime, bindparam, create_engine, inspect, text
+from Back_End import csv_processor
+
+pd.options.mode.copy_on_write = True
+
+NULL_SENTINELS = ['NA', 'NULL', 'null']
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_PARTITIONS = 4
+DEFAULT_PARTITION_WORKERS = 2  # partitions read at the same time
+PARTITION_PREFETCH_CHUNKS = 2  # chunks buffered per in-flight partition
+SCHEMA_TTL_SECONDS = 300
+
+# Row estimates above these thresholds suggest a different execution mode
+STREAMING_ROW_THRESHOLD = 1_000_000
+IN_DATABASE_ROW_THRESHOLD = 20_000_000
+SAMPLE_ROWS = 100_000  # rows kept to estimate medians / modes / date columns
+
+# Streaming runs write their cleaned CSV here; files of ended sessions are swept by age
+CLEANED_CSV_DIR = os.path.join(tempfile.gettempdir(), "autodp_cleaned")
+CLEANED_CSV_MAX_AGE = 24 * 3600
+
+
+# =========================
+# SCHEMA BROWSER (CACHED)
+# =========================
+@st.cache_resource
+def get_engine(conn_str):
+    """One pooled engine per connection string, shared across reruns."""
+    return create_engine(conn_str)
+
+
+def _estimate_rows(conn, dialect, quote, table, schema=None):
+    """Row count from catalog statistics (never COUNT(*)); None if unavailable."""
+    try:
+        if dialect == "postgresql":
+            return conn.execute(text(
+                "SELECT c.reltuples::bigint FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE c.relname = :t AND n.nspname = COALESCE(:s, current_schema())"
+            ), {"t": table, "s": schema}).scalar()
+        if dialect == "mysql":
+            return conn.execute(text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = COALESCE(:s, DATABASE()) AND TABLE_NAME = :t"
+            ), {"t": table, "s": schema}).scalar()
+        if dialect == "sqlite":
+            has_stats = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )).scalar()
+            if has_stats:
+                stat = conn.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :t LIMIT 1"), {"t": table}).scalar()
+                if stat:
+                    return int(stat.split()[0])
+            # MAX(rowid) is an index lookup; exact for append-only tables
+            return conn.execute(text(f"SELECT MAX(rowid) FROM {quote(table)}")).scalar() or 0
+    except Exception:
+        return None
+    return None
+
+
+@st.cache_data(ttl=SCHEMA_TTL_SECONDS, show_spinner=False)
+def get_schema(conn_str, schema=None):
+    """
+    Tables, columns, types and estimated row counts via SQLAlchemy's inspector.
+    Cached for SCHEMA_TTL_SECONDS per connection string.
+    Returns (tables_dict, None) or (None, error).
+    """
+    engine = get_engine(conn_str)
+    quote = engine.dialect.identifier_preparer.quote
+    try:
+        with engine.connect() as conn:
+            inspector = inspect(conn)
+            tables = {}
+            for table in inspector.get_table_names(schema=schema):
+                columns = [
+                    {"column": col["name"], "type": str(col["type"]), "nullable": col.get("nullable", True)}
+                    for col in inspector.get_columns(table, schema=schema)
+                ]
+                tables[table] = {
+                    "columns": columns,
+                    "estimated_rows": _estimate_rows(conn, engine.dialect.name, quote, table, schema),
+                }
+        return tables, None
+    except Exception as e:
+        return None, f"Schema error: {e}"
+
+
+def suggest_execution_mode(estimated_rows):
+    """Pick the execution mode from a row estimate before any data moves."""
+    if estimated_rows is None or estimated_rows < STREAMING_ROW_THRESHOLD:
+        return "memory"
+    if estimated_rows < IN_DATABASE_ROW_THRESHOLD:
+        return "streaming"
+    return "in_database"
+
+
+def build_select(conn_str, table, columns=None):
+    """SELECT statement for a table, quoted for the connection's dialect."""
+    quote = get_engine(conn_str).dialect.identifier_preparer.quote
+    cols = ", ".join(quote(col) for col in columns) if columns else "*"
+    return f"SELECT {cols} FROM {quote(table)}"
+
+
+# =========================
+# STREAMING EXTRACTION
+# =========================
+def stream_query(conn_str, query, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield the result of `query` as DataFrame chunks.
+    Uses a server-side cursor (stream_results) where the driver supports it,
+    so the full result set is never materialized in memory.
+    """
+    engine = create_engine(conn_str)
+    try:
+        with engine.connect().execution_options(stream_results=True) as conn:
+            for chunk in pd.read_sql(text(query), conn, chunksize=chunksize):
+                yield chunk
+    finally:
+        engine.dispose()
+
+
+# =========================
+# PARTITIONED PARALLEL EXTRACTION
+# =========================
+def _range_conditions(key, low, high, partitions):
+    """WHERE clauses splitting [low, high] into contiguous ranges."""
+    if isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+        low, high = int(low), int(high)
+        step = max(1, -(-(high - low + 1) // partitions))
+        edges = list(range(low, high + 1, step)) + [high + 1]
+        return [f"{key} >= {a} AND {key} < {b}" for a, b in zip(edges[:-1], edges[1:])]
+
+    edges = [float(edge) for edge in np.linspace(float(low), float(high), partitions + 1)]
+    conditions = [f"{key} >= {a!r} AND {key} < {b!r}" for a, b in zip(edges[:-2], edges[1:-1])]
+    conditions.append(f"{key} >= {edges[-2]!r} AND {key} <= {edges[-1]!r}")
+    return conditions
+
+
+def partition_queries(conn_str, query, key_column, partitions=DEFAULT_PARTITIONS, strategy="range"):
+    """
+    Split `query` into `partitions` disjoint queries on a numeric key column.
+    - range: contiguous [low, high) slices between MIN(key) and MAX(key)
+    - hash:  ABS(key % n) = i, for skewed keys
+    Each partition is ordered by the key so the reassembled result is deterministic;
+    rows with a NULL key come last in their own partition.
+    """
+    engine = get_engine(conn_str)
+    key = engine.dialect.identifier_preparer.quote(key_column)
+    base = _strip_query(query)
+    partitions = max(1, int(partitions))
+
+    if strategy == "hash":
+        conditions = [f"ABS({key} % {partitions}) = {i}" for i in range(partitions)]
+    else:
+        with engine.connect() as conn:
+            low, high = conn.execute(text(f"SELECT MIN({key}), MAX({key}) FROM ({base}) AS src")).fetchone()
+        if low is None:
+            return [f"SELECT * FROM ({base}) AS src"]
+        conditions = _range_conditions(key, low, high, partitions)
+
+    queries = [f"SELECT * FROM ({base}) AS src WHERE {cond} ORDER BY {key}" for cond in conditions]
+    queries.append(f"SELECT * FROM ({base}) AS src WHERE {key} IS NULL")
+    return queries
+
+
+def iter_partitions(conn_str, query, key_column, partitions=DEFAULT_PARTITIONS, strategy="range",
+                    workers=DEFAULT_PARTITION_WORKERS, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read the partitions over a pooled engine, at most `workers` at a time, and
+    yield their chunks in partition order (so downstream chunked cleaning sees a
+    deterministic stream). Each partition is read in `chunksize` chunks with a
+    server-side cursor; a partition buffers at most PARTITION_PREFETCH_CHUNKS
+    chunks ahead of the consumer, so memory is bounded by
+    workers x (PARTITION_PREFETCH_CHUNKS + 1) chunks whatever the partition count.
+    """
+    queries = partition_queries(conn_str, query, key_column, partitions, strategy)
+    workers = max(1, min(int(workers), len(queries)))
+    engine = create_engine(conn_str, pool_size=workers, max_overflow=0)
+    stop = threading.Event()
+    finished = object()
+
+    def put(out, item):
+        # Blocks while the consumer is behind; gives up once the generator is closed
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(sql, out):
+        try:
+            with engine.connect().execution_options(stream_results=True) as conn:
+                for chunk in pd.read_sql(text(sql), conn, chunksize=chunksize):
+                    if not put(out, chunk):
+                        return
+            put(out, finished)
+        except Exception as e:
+            put(out, e)
+
+    pending = iter(queries)
+    in_flight = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                for sql in itertools.islice(pending, workers):
+                    out = queue.Queue(maxsize=PARTITION_PREFETCH_CHUNKS)
+                    pool.submit(fetch, sql, out)
+                    in_flight.append(out)
+                while in_flight:
+                    out = in_flight.pop(0)
+                    while True:
+                        item = out.get()
+                        if item is finished:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                    # This partition's slot is free: start the next one
+                    for sql in itertools.islice(pending, 1):
+                        out = queue.Queue(maxsize=PARTITION_PREFETCH_CHUNKS)
+                        pool.submit(fetch, sql, out)
+                        in_flight.append(out)
+            finally:
+                stop.set()
+    finally:
+        engine.dispose()
+
+
+def read_partitioned(conn_str, query, key_column, partitions=DEFAULT_PARTITIONS, strategy="range",
+                     workers=DEFAULT_PARTITION_WORKERS):
+    """
+    Parallel replacement for pd.read_sql(query, engine).
+    Returns (df, None) on success or (None, error).
+    """
+    try:
+        frames = list(iter_partitions(conn_str, query, key_column, partitions, strategy, workers))
+        non_empty = [frame for frame in frames if not frame.empty] or frames[:1]
+        return pd.concat(non_empty, ignore_index=True), None
+    except Exception as e:
+        return None, f"Partitioned read error: {e}"
+
+
+# =========================
+# QUERY PLANNER (PUSHDOWN)
+# =========================
+def _strip_query(query):
+    return query.strip().rstrip(";").strip()
+
+
+def probe_query(conn_str, query, sample_rows=100):
+    """
+    Fetch a few rows of the wrapped query to learn its columns and types
+    without pulling the full result. Returns (sample_df, None) or (None, error).
+    """
+    try:
+        sql = f"SELECT * FROM ({_strip_query(query)}) AS src LIMIT {int(sample_rows)}"
+        return pd.read_sql(text(sql), get_engine(conn_str)), None
+    except Exception as e:
+        return None, f"Probe error: {e}"
+
+
+def plan_query(conn_str, query, columns=None, distinct=False, text_columns=None,
+               null_sentinels=NULL_SENTINELS):
+    """
+    Rewrite `query` so the source database does the cheap work:
+    - project only `columns`
+    - optionally SELECT DISTINCT (on the projected columns)
+    - turn null sentinels into real NULLs for `text_columns` via NULLIF
+    Returns the rewritten SQL; the original query is used as a subquery.
+    """
+    quote = get_engine(conn_str).dialect.identifier_preparer.quote
+    text_columns = set(text_columns) if text_columns is not None else set()
+
+    if not columns:
+        if distinct:
+            return f"SELECT DISTINCT * FROM ({_strip_query(query)}) AS src"
+        return _strip_query(query)
+
+    select_items = []
+    for col in columns:
+        expr = quote(col)
+        if col in text_columns:
+            for sentinel in null_sentinels:
+                literal = sentinel.replace("'", "''")
+                expr = f"NULLIF({expr}, '{literal}')"
+            expr = f"{expr} AS {quote(col)}"
+        select_items.append(expr)
+
+    keyword = "SELECT DISTINCT" if distinct else "SELECT"
+    return f"{keyword} {', '.join(select_items)} FROM ({_strip_query(query)}) AS src"
+
+
+# =========================
+# INCREMENTAL EXTRACTION
+# =========================
+def watermark_key(conn_str, query, key_column):
+    """Stable id for a (source, query, key column); the connection string itself is never stored."""
+    raw = "\n".join([conn_str, _strip_query(query), key_column])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _watermark_value(value):
+    """
+    Make a MAX() result JSON friendly: timestamps -> ISO strings, NUMERIC/DECIMAL
+    -> int when integral, else its exact decimal string (a float would round it).
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else str(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat(sep=" ") if hasattr(value, "hour") else value.isoformat()
+    return value
+
+
+def plan_incremental(conn_str, query, key_column, watermark=None):
+    """
+    Build the SQL for rows added since `watermark` on a monotonic `key_column`.
+    Reads only MAX(key) first, so a rerun with no new rows costs one indexed lookup.
+    Returns ((sql, new_watermark), None), ((None, watermark), None) when nothing is new,
+    or (None, error).
+    """
+    engine = get_engine(conn_str)
+    quote = engine.dialect.identifier_preparer.quote
+    base = _strip_query(query)
+    key = quote(key_column)
+    try:
+        with engine.connect() as conn:
+            high = conn.execute(text(f"SELECT MAX({key}) FROM ({base}) AS src")).scalar()
+    except Exception as e:
+        return None, f"Watermark error: {e}"
+
+    if high is None:
+        return (None, watermark), None
+    exact = isinstance(high, Decimal)
+    high = _watermark_value(high)
+    if watermark is not None and high == watermark:
+        return (None, watermark), None
+
+    def literal(value):
+        # Exact NUMERIC marks are stored as strings: render them as numeric literals, not text
+        return _sql_literal(Decimal(str(value)) if exact else value)
+
+    # Upper bound pins the window so rows appended mid-run are picked up next time
+    conditions = [f"{key} <= {literal(high)}"]
+    if watermark is not None:
+        conditions.insert(0, f"{key} > {literal(watermark)}")
+    sql = f"SELECT * FROM ({base}) AS src WHERE {' AND '.join(conditions)}"
+    return (sql, high), None
+
+
+# =========================
+# CHUNKED CLEANING
+# =========================
+def profile_chunks(chunks, sample_rows=SAMPLE_ROWS, seed=0):
+    """
+    First pass over the chunks: exact row / null counts plus a bounded uniform
+    sample of rows (bottom-k on random keys) used to estimate fill values.
+    """
+    rng = np.random.default_rng(seed)
+    sample = None
+    sample_keys = None
+    total_rows = 0
+    null_counts = None
+    columns = None
+    dtypes = {}
+
+    for chunk in chunks:
+        chunk = chunk.replace(NULL_SENTINELS, pd.NA)
+        if columns is None:
+            columns = chunk.columns.tolist()
+            null_counts = pd.Series(0, index=columns, dtype="int64")
+        total_rows += len(chunk)
+        null_counts = null_counts.add(chunk.isnull().sum(), fill_value=0)
+        for col in columns:
+            # A column that is all-null in one chunk comes back as object; keep the first real dtype
+            if col not in dtypes or (dtypes[col] == 'object' and chunk[col].notna().any()):
+                dtypes[col] = chunk[col].dtype
+
+        keys = rng.random(len(chunk))
+        if sample is None:
+            sample, sample_keys = chunk, keys
+        else:
+            sample = pd.concat([sample, chunk], ignore_index=True)
+            sample_keys = np.concatenate([sample_keys, keys])
+        if len(sample) > sample_rows:
+            keep = np.argpartition(sample_keys, sample_rows)[:sample_rows]
+            sample, sample_keys = sample.iloc[keep].reset_index(drop=True), sample_keys[keep]
+
+    if columns is None:
+        return None
+
+    return {
+        "columns": columns,
+        "dtypes": dtypes,
+        "total_rows": total_rows,
+        "null_counts": null_counts.astype("int64"),
+        "sample": sample,
+    }
+
+
+def build_cleaning_plan(profile, columns_to_include=None, columns_to_clean=None):
+    """
+    Turn a chunk profile into the decisions process_file makes on a full frame:
+    which columns are dates, the fill value per column, which columns are dropped
+    and whether rows with leftover nulls are dropped.
+    """
+    sample = profile["sample"]
+    columns = profile["columns"]
+    if columns_to_include:
+        columns = [col for col in columns_to_include if col in columns]
+    sample = sample[columns]
+
+    date_columns = csv_processor.detect_date_columns(sample)
+    clean_targets = columns_to_clean if columns_to_clean else columns
+
+    fill_values = {}
+    for column in clean_targets:
+        if column not in columns:
+            continue
+        values = sample[column].dropna()
+        if column in date_columns:
+            values = pd.to_datetime(values, errors='coerce').dropna().dt.strftime('%Y-%m-%d')
+            if not values.empty:
+                fill_values[column] = values.mode()[0]
+        elif profile["dtypes"][column] == 'object' and not values.empty:
+            fill_values[column] = values.mode()[0]
+        elif pd.api.types.is_numeric_dtype(profile["dtypes"][column]) and not values.empty:
+            fill_values[column] = values.median()
+
+    # After filling only unfilled columns can still hold nulls
+    total_rows = max(1, profile["total_rows"])
+    drop_columns = [
+        col for col in columns
+        if col not in fill_values and profile["null_counts"][col] / total_rows > 0.4
+    ]
+    kept = [col for col in columns if col not in drop_columns]
+    unfilled = [col for col in kept if col not in fill_values]
+
+    drop_null_rows = False
+    if unfilled and len(sample):
+        drop_null_rows = sample[unfilled].isnull().any(axis=1).mean() * 100 < 10
+    elif not unfilled:
+        drop_null_rows = True  # nothing left to drop, matches process_file
+
+    return {
+        "columns": kept,
+        "date_columns": [col for col in date_columns if col in kept],
+        "fill_values": fill_values,
+        "dropped_columns": drop_columns,
+        "drop_null_rows": drop_null_rows,
+    }
+
+
+class RowHashes:
+    """
+    64-bit hashes of the rows seen so far, kept as one sorted uint64 array:
+    8 bytes per distinct row (a Python set costs 60+). Memory still grows with
+    the number of distinct rows; push DISTINCT into the query or turn dedup
+    off when that matters.
+    """
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add_new(self, hashes):
+        """Boolean mask of the `hashes` not seen before; those are remembered."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        pos = np.searchsorted(self.hashes, hashes)
+        seen = pos < len(self.hashes)
+        seen[seen] = self.hashes[pos[seen]] == hashes[seen]
+        new = np.sort(hashes[~seen])
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+        return ~seen
+
+
+def clean_chunk(df, plan, seen_hashes=None):
+    """
+    Apply a cleaning plan to one chunk.
+    `seen_hashes` (RowHashes) carries row hashes across chunks so duplicates are dropped globally.
+    """
+    if seen_hashes is not None:
+        df = df.drop_duplicates()
+        df = df[seen_hashes.add_new(pd.util.hash_pandas_object(df, index=False).to_numpy())]
+
+    df = df.replace(NULL_SENTINELS, pd.NA)
+    df = df[plan["columns"]]
+
+    for column in plan["date_columns"]:
+        df = csv_processor.normalize_dates(df, column)
+
+    for column, value in plan["fill_values"].items():
+        if column in df.columns:
+            df[column] = df[column].fillna(value)
+
+    if plan["drop_null_rows"]:
+        df = df.dropna()
+
+    return df
+
+
+def clean_query_in_chunks(conn_str, query, columns_to_include=None, columns_to_clean=None,
+                          chunksize=DEFAULT_CHUNKSIZE, dedup=True, reader=None):
+    """
+    Two streaming passes over the query: profile, then clean chunk by chunk.
+    `reader` is an optional zero-argument callable returning a chunk iterator
+    (e.g. a partitioned reader); it defaults to stream_query.
+    Returns (plan, generator of cleaned chunks).
+    """
+    if reader is None:
+        def reader():
+            return stream_query(conn_str, query, chunksize)
+
+    profile = profile_chunks(reader())
+    if profile is None:
+        return None, iter(())
+
+    plan = build_cleaning_plan(profile, columns_to_include, columns_to_clean)
+    seen_hashes = RowHashes() if dedup else None
+
+    def cleaned():
+        for chunk in reader():
+            out = clean_chunk(chunk, plan, seen_hashes)
+            if not out.empty:
+                yield out
+
+    return plan, cleaned()
+
+
+# =========================
+# IN-DATABASE CLEANING
+# =========================
+STAGE_TABLE_PREFIX = "autodp_stage"
+
+
+def _stage_name(prefix=STAGE_TABLE_PREFIX):
+    """Per-run name for a temporary stage table, so concurrent sessions never share one."""
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+def _drop_temp_table(conn, dialect, quote, name):
+    """
+    Drop a TEMPORARY table, qualified so that a permanent table of the same
+    name is never touched: temp. on SQLite, pg_temp. on PostgreSQL and
+    DROP TEMPORARY TABLE on MySQL.
+    """
+    if dialect == "mysql":
+        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {quote(name)}"))
+    elif dialect == "sqlite":
+        conn.execute(text(f"DROP TABLE IF EXISTS temp.{quote(name)}"))
+    elif dialect == "postgresql":
+        conn.execute(text(f"DROP TABLE IF EXISTS pg_temp.{quote(name)}"))
+    else:
+        conn.execute(text(f"DROP TABLE IF EXISTS {quote(name)}"))
+
+
+def _sql_literal(value):
+    """Render a fill value as a SQL literal."""
+    if isinstance(value, (bool, np.bool_)):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return repr(float(value)) if isinstance(value, (float, np.floating)) else str(int(value))
+    if isinstance(value, Decimal):  # AVG() on PostgreSQL / MySQL: must stay numeric, not a string
+        return format(value, "f")
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _column_median(conn, quote, table, col, non_null):
+    """Median via ORDER BY / LIMIT / OFFSET (portable; no percentile function needed)."""
+    if non_null == 0:
+        return None
+    limit = 2 - non_null % 2
+    offset = (non_null - 1) // 2
+    sql = (
+        f"SELECT AVG(v) FROM (SELECT {quote(col)} AS v FROM {table} "
+        f"WHERE {quote(col)} IS NOT NULL ORDER BY {quote(col)} LIMIT {limit} OFFSET {offset}) AS m"
+    )
+    return conn.execute(text(sql)).scalar()
+
+
+def _column_mode(conn, quote, table, col):
+    """Most frequent value; ties resolve to the smallest value like pandas.Series.mode()[0]."""
+    sql = (
+        f"SELECT {quote(col)} FROM {table} WHERE {quote(col)} IS NOT NULL "
+        f"GROUP BY {quote(col)} ORDER BY COUNT(*) DESC, {quote(col)} LIMIT 1"
+    )
+    return conn.execute(text(sql)).scalar()
+
+
+def clean_in_database(conn_str, query, target_table, columns_to_include=None, sample_rows=500):
+    """
+    Run the cleaning rules of csv_processor.process_file as SQL inside the source database.
+    Only a small sample (for type/date detection) and summary statistics come back to the app.
+    Steps: dedup + null sentinels into a temp stage table, aggregate null counts,
+    median/mode fill values, then CREATE TABLE target AS SELECT COALESCE(...).
+    SQLite is the reference dialect; date normalization (date()) is applied on SQLite only.
+    Returns (summary, None) on success or (None, error).
+    """
+    sample, error = probe_query(conn_str, query, sample_rows)
+    if error:
+        return None, error
+
+    columns = sample.columns.tolist()
+    if columns_to_include:
+        columns = [col for col in columns_to_include if col in columns]
+    sample = sample[columns].replace(NULL_SENTINELS, pd.NA)
+
+    engine = create_engine(conn_str)
+    dialect = engine.dialect.name
+    quote = engine.dialect.identifier_preparer.quote
+    text_columns = [col for col in columns if sample[col].dtype == 'object']
+    numeric_columns = [col for col in columns if pd.api.types.is_numeric_dtype(sample[col])]
+    date_columns = csv_processor.detect_date_columns(sample) if dialect == "sqlite" else []
+    stage_name = _stage_name()
+    stage = quote(stage_name)
+    executed = []
+
+    try:
+        with engine.begin() as conn:
+            # 1) Stage: dedup on the raw rows, null sentinels -> NULL, dates -> YYYY-MM-DD
+            stage_items = []
+            for col in columns:
+                expr = quote(col)
+                if col in text_columns:
+                    for sentinel in NULL_SENTINELS:
+                        expr = f"NULLIF({expr}, {_sql_literal(sentinel)})"
+                if col in date_columns:
+                    expr = f"date({expr})"
+                stage_items.append(f"{expr} AS {quote(col)}")
+            date_filter = " AND ".join(f"{quote(col)} IS NOT NULL" for col in date_columns)
+            stage_sql = (
+                f"CREATE TEMPORARY TABLE {stage} AS SELECT * FROM ("
+                f"SELECT {', '.join(stage_items)} FROM (SELECT DISTINCT * FROM ({_strip_query(query)}) AS q) AS raw"
+                f") AS s" + (f" WHERE {date_filter}" if date_filter else "")
+            )
+            conn.execute(text(stage_sql))
+            executed.append(stage_sql)
+
+            # 2) One aggregate scan for row and null counts
+            counts_sql = "SELECT COUNT(*), " + ", ".join(f"COUNT({quote(col)})" for col in columns) + f" FROM {stage}"
+            counts = conn.execute(text(counts_sql)).fetchone()
+            executed.append(counts_sql)
+            total_rows = counts[0]
+            non_null = dict(zip(columns, counts[1:]))
+
+            # 3) Fill values: median for numeric, mode for text/dates
+            fill_values = {}
+            for col in columns:
+                if non_null[col] == 0:
+                    continue
+                if col in numeric_columns:
+                    fill_values[col] = _column_median(conn, quote, stage, col, non_null[col])
+                elif col in text_columns:
+                    fill_values[col] = _column_mode(conn, quote, stage, col)
+
+            # 4) Same drop rules as process_file, decided from the counts
+            denom = max(1, total_rows)
+            missing_pct = {col: 100 * (total_rows - non_null[col]) / denom for col in columns}
+            dropped_columns = [col for col in columns if col not in fill_values and missing_pct[col] > 40]
+            kept = [col for col in columns if col not in dropped_columns]
+            unfilled = [col for col in kept if col not in fill_values]
+
+            row_filter = ""
+            if unfilled:
+                any_null = " OR ".join(f"{quote(col)} IS NULL" for col in unfilled)
+                null_rows = conn.execute(
+                    text(f"SELECT COUNT(*) FROM {stage} WHERE {any_null}")
+                ).scalar()
+                if total_rows and null_rows / total_rows * 100 < 10:
+                    row_filter = " WHERE " + " AND ".join(f"{quote(col)} IS NOT NULL" for col in unfilled)
+
+            # 5) Materialize the cleaned table
+            select_items = [
+                f"COALESCE({quote(col)}, {_sql_literal(fill_values[col])}) AS {quote(col)}"
+                if col in fill_values else quote(col)
+                for col in kept
+            ]
+            create_sql = (
+                f"CREATE TABLE {quote(target_table)} AS SELECT {', '.join(select_items)} "
+                f"FROM {stage}{row_filter}"
+            )
+            conn.execute(text(f"DROP TABLE IF EXISTS {quote(target_table)}"))
+            conn.execute(text(create_sql))
+            executed.append(create_sql)
+
+            rows_written = conn.execute(text(f"SELECT COUNT(*) FROM {quote(target_table)}")).scalar()
+            _drop_temp_table(conn, dialect, quote, stage_name)
+
+    except Exception as e:
+        return None, f"In-database cleaning error: {e}"
+    finally:
+        engine.dispose()
+
+    stats = pd.DataFrame({
+        "column": columns,
+        "missing_pct": [round(missing_pct[col], 2) for col in columns],
+        "fill_value": [fill_values.get(col) for col in columns],
+        "dropped": [col in dropped_columns for col in columns],
+    })
+    return {
+        "rows_after_dedup": total_rows,
+        "rows_written": rows_written,
+        "target_table": target_table,
+        "date_columns": date_columns,
+        "dropped_columns": dropped_columns,
+        "stats": stats,
+        "sql": executed,
+    }, None
+
+
+# =========================
+# CHUNKED WRITERS
+# =========================
+def remove_cleaned_csv(path):
+    """Delete a CSV written by write_chunks_to_csv; a missing file is not an error."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def sweep_cleaned_csvs(max_age=CLEANED_CSV_MAX_AGE):
+    """Delete cleaned CSVs older than `max_age` seconds (left behind by sessions that ended)."""
+    cutoff = time.time() - max_age
+    try:
+        with os.scandir(CLEANED_CSV_DIR) as it:
+            for entry in it:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+
+
+def write_chunks_to_csv(chunks, path=None):
+    """
+    Append cleaned chunks to a CSV file on disk. Returns (path, rows_written).
+    Without `path` the file goes to CLEANED_CSV_DIR; the caller removes it with
+    remove_cleaned_csv once it is no longer offered for download.
+    """
+    if path is None:
+        os.makedirs(CLEANED_CSV_DIR, exist_ok=True)
+        sweep_cleaned_csvs()
+        fd, path = tempfile.mkstemp(suffix=".csv", prefix="cleaned_", dir=CLEANED_CSV_DIR)
+        os.close(fd)
+
+    rows = 0
+    header = True
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            for chunk in chunks:
+                chunk.to_csv(fh, index=False, header=header)
+                header = False
+                rows += len(chunk)
+    except Exception:
+        remove_cleaned_csv(path)
+        raise
+    return path, rows
+
+
+def stream_clean_to_csv(conn_str, query, chunksize=DEFAULT_CHUNKSIZE,
+                        columns_to_include=None, columns_to_clean=None, dedup=True, reader=None):
+    """
+    Streaming counterpart of csv_processor.process_file for SQL sources.
+    Pass dedup=False when the query already applies DISTINCT, or to keep memory
+    flat: global dedup holds 8 bytes per distinct row (RowHashes).
+    Returns ((csv_path, summary), None) on success or (None, error).
+    """
+    try:
+        plan, chunks = clean_query_in_chunks(
+            conn_str, query, columns_to_include, columns_to_clean, chunksize, dedup, reader
+        )
+        if plan is None:
+            return None, "Query returned no rows."
+        path, rows = write_chunks_to_csv(chunks)
+        summary = {
+            "rows_written": rows,
+            "columns": plan["columns"],
+            "dropped_columns": plan["dropped_columns"],
+        }
+        return (path, summary), None
+    except Exception as e:
+        return None, f"Streaming error: {e}"
+
+
+# =========================
+# BULK WRITER
+# =========================
+# Relaxed durability for the duration of a load only; restored afterwards.
+SQLITE_LOAD_PRAGMAS = {"synchronous": "OFF", "journal_mode": "MEMORY", "cache_size": "-200000"}
+
+
+def _copy_insert(table, conn, keys, data_iter):
+    """pandas to_sql `method` for PostgreSQL: stream the batch through COPY ... FROM STDIN."""
+    name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    _copy_rows(conn, name, keys, data_iter)
+
+
+def _copy_rows(conn, name, keys, rows):
+    """COPY `rows` into the (already quoted) table `name` on PostgreSQL."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+
+    columns = ", ".join(f'"{k}"' for k in keys)
+    sql = f"COPY {name} ({columns}) FROM STDIN WITH CSV"
+
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with cur.copy(sql) as copy:
+                copy.write(buf.read())
+
+
+def _insert_method(dialect):
+    """Fastest insert strategy per dialect."""
+    if dialect == "postgresql":
+        return _copy_insert
+    if dialect == "sqlite":
+        return None  # plain executemany beats multi-row VALUES on SQLite
+    return "multi"
+
+
+def _iter_batches(data, batch_size):
+    """
+    Yield DataFrames of at most `batch_size` rows from a DataFrame or an iterable of chunks.
+    An empty chunk is yielded as is, so writers still create the table schema from it.
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    for chunk in chunks:
+        if chunk.empty:
+            yield chunk
+            continue
+        for start in range(0, len(chunk), batch_size):
+            yield chunk.iloc[start:start + batch_size]
+
+
+def _set_sqlite_pragmas(conn, pragmas):
+    """Apply pragmas and return their previous values."""
+    previous = {}
+    for name, value in pragmas.items():
+        previous[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        conn.exec_driver_sql(f"PRAGMA {name}={value}")
+    conn.commit()
+    return previous
+
+
+def bulk_write(data, conn_str, table, if_exists="replace", batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load a DataFrame (or an iterable of DataFrame chunks) into `table`.
+    - one transaction per batch of `batch_size` rows
+    - COPY on PostgreSQL, executemany + relaxed pragmas on SQLite, multi-row VALUES elsewhere
+    - replace loads into a stage table that is swapped in only after the last batch,
+      so a failed load leaves the existing table untouched
+    Returns (stats, None) on success or (None, error). Stats include rows/sec.
+    """
+    engine = create_engine(conn_str)
+    dialect = engine.dialect.name
+    quote = engine.dialect.identifier_preparer.quote
+    method = _insert_method(dialect)
+    stage = f"{table}_autodp_load_{uuid.uuid4().hex[:8]}" if if_exists == "replace" else None
+    rows = 0
+    batches = 0
+    start = time.perf_counter()
+
+    try:
+        with engine.connect() as conn:
+            previous = _set_sqlite_pragmas(conn, SQLITE_LOAD_PRAGMAS) if dialect == "sqlite" else {}
+            try:
+                mode = "replace" if stage else if_exists
+                for batch in _iter_batches(data, batch_size):
+                    with conn.begin():
+                        batch.to_sql(stage or table, conn, if_exists=mode, index=False, method=method)
+                    mode = "append"
+                    rows += len(batch)
+                    batches += 1
+                if not batches:
+                    raise ValueError(f"no data (not even a column list) was given; `{table}` was left unchanged")
+                if stage:
+                    with conn.begin():
+                        conn.execute(text(f"DROP TABLE IF EXISTS {quote(table)}"))
+                        conn.execute(text(f"ALTER TABLE {quote(stage)} RENAME TO {quote(table)}"))
+                    stage = None
+            finally:
+                if stage:
+                    with conn.begin():
+                        conn.execute(text(f"DROP TABLE IF EXISTS {quote(stage)}"))
+                if previous:
+                    _set_sqlite_pragmas(conn, previous)
+    except Exception as e:
+        if if_exists == "append" and rows:
+            return None, f"Bulk write error: {e} ({rows:,} rows were appended before the failure)"
+        return None, f"Bulk write error: {e}"
+    finally:
+        engine.dispose()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "batches": batches,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else float(rows),
+        "method": "COPY" if method is _copy_insert else (method or "executemany"),
+    }, None
+
+
+# =========================
+# MERGE (UPSERT) WRITER
+# =========================
+def _merge_sql(dialect, quote, table, stage, columns, key_columns):
+    """Set-based upsert from the stage table; updates only rows whose values changed."""
+    cols = ", ".join(quote(col) for col in columns)
+    keys = ", ".join(quote(col) for col in key_columns)
+    values = [col for col in columns if col not in key_columns]
+    target = quote(table)
+
+    if dialect == "mysql":
+        if not values:
+            return f"INSERT IGNORE INTO {target} ({cols}) SELECT {cols} FROM {stage}"
+        updates = ", ".join(f"{quote(col)} = VALUES({quote(col)})" for col in values)
+        return f"INSERT INTO {target} ({cols}) SELECT {cols} FROM {stage} ON DUPLICATE KEY UPDATE {updates}"
+
+    if dialect not in ("sqlite", "postgresql"):
+        raise ValueError(f"Merge mode is not supported for '{dialect}' (use SQLite, PostgreSQL or MySQL).")
+
+    # "WHERE true" keeps SQLite from parsing ON CONFLICT as a join constraint
+    insert = f"INSERT INTO {target} ({cols}) SELECT {cols} FROM {stage} WHERE true"
+    if not values:
+        return f"{insert} ON CONFLICT ({keys}) DO NOTHING"
+    distinct = "IS NOT" if dialect == "sqlite" else "IS DISTINCT FROM"
+    updates = ", ".join(f"{quote(col)} = excluded.{quote(col)}" for col in values)
+    changed = " OR ".join(f"{target}.{quote(col)} {distinct} excluded.{quote(col)}" for col in values)
+    return f"{insert} ON CONFLICT ({keys}) DO UPDATE SET {updates} WHERE {changed}"
+
+
+def _has_unique_key(conn, table, key_columns):
+    """True if the primary key or a unique index / constraint covers exactly `key_columns`."""
+    inspector = inspect(conn)
+    wanted = set(key_columns)
+    if set(inspector.get_pk_constraint(table).get("constrained_columns") or []) == wanted:
+        return True
+    if any(ix.get("unique") and set(ix["column_names"]) == wanted for ix in inspector.get_indexes(table)):
+        return True
+    return any(set(uc["column_names"]) == wanted for uc in inspector.get_unique_constraints(table))
+
+
+def _ensure_merge_target(conn, dialect, quote, table, key_columns, batch, exists):
+    """
+    Create the target from the batch schema if missing and make sure the key is unique-indexed.
+    On MySQL an existing table without such a key gets one; if that fails (duplicate keys
+    already in the table) the merge stops instead of silently appending duplicates.
+    """
+    if not exists:
+        batch.head(0).to_sql(table, conn, index=False)
+    index_name = quote(f"ux_{table}_{'_'.join(key_columns)}")
+    key_list = ", ".join(quote(col) for col in key_columns)
+    if dialect in ("sqlite", "postgresql"):
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {quote(table)} ({key_list})"))
+    elif not exists or not _has_unique_key(conn, table, key_columns):
+        conn.execute(text(f"CREATE UNIQUE INDEX {index_name} ON {quote(table)} ({key_list})"))
+
+
+def _load_stage(conn, dialect, quote, stage, batch):
+    """
+    Replace the rows of the temporary stage table with `batch`. pandas to_sql
+    cannot create or reliably find TEMPORARY tables, so rows are inserted directly:
+    COPY on PostgreSQL, executemany elsewhere.
+    """
+    conn.execute(text(f"DELETE FROM {quote(stage)}"))
+    if batch.empty:
+        return
+    keys = batch.columns.tolist()
+    rows = batch.astype(object).where(batch.notna(), None).itertuples(index=False, name=None)
+    if dialect == "postgresql":
+        _copy_rows(conn, quote(stage), keys, rows)
+        return
+    params = [f"p{i}" for i in range(len(keys))]
+    sql = (f"INSERT INTO {quote(stage)} ({', '.join(quote(col) for col in keys)}) "
+           f"VALUES ({', '.join(':' + p for p in params)})")
+    # Typed binds let SQLAlchemy convert timestamps per dialect, as to_sql does
+    dates = [bindparam(p, type_=DateTime()) for p, col in zip(params, keys)
+             if pd.api.types.is_datetime64_any_dtype(batch[col])]
+    conn.execute(text(sql).bindparams(*dates), [dict(zip(params, row)) for row in rows])
+
+
+def merge_write(data, conn_str, table, key_columns, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert a DataFrame (or chunk iterator) into `table` on `key_columns`.
+    Each batch is loaded into a session TEMPORARY stage table (dropped by the
+    database even if the app dies) and merged with one
+    INSERT ... ON CONFLICT / ON DUPLICATE KEY statement in its own transaction.
+    A missing target table is created; a unique index on the key is added if needed.
+    Rows repeating a key within a batch are collapsed to the last one first:
+    PostgreSQL refuses to update the same row twice in one ON CONFLICT statement.
+    Returns (stats, None) on success or (None, error).
+    """
+    if not key_columns:
+        return None, "Merge mode needs at least one key column."
+
+    engine = create_engine(conn_str)
+    dialect = engine.dialect.name
+    quote = engine.dialect.identifier_preparer.quote
+    stage = _stage_name("autodp_merge")
+    rows = 0
+    changed = 0
+    duplicates = 0
+    batches = 0
+    start = time.perf_counter()
+
+    try:
+        with engine.connect() as conn:
+            previous = _set_sqlite_pragmas(conn, SQLITE_LOAD_PRAGMAS) if dialect == "sqlite" else {}
+            try:
+                target_exists = inspect(conn).has_table(table)
+                conn.commit()
+                stage_ready = False
+                for batch in _iter_batches(data, batch_size):
+                    missing = [col for col in key_columns if col not in batch.columns]
+                    if missing:
+                        raise ValueError(f"key column(s) not in the data: {', '.join(missing)}")
+                    rows += len(batch)
+                    deduped = batch.drop_duplicates(subset=key_columns, keep="last")
+                    duplicates += len(batch) - len(deduped)
+                    batch = deduped
+                    with conn.begin():
+                        if not stage_ready:
+                            _ensure_merge_target(conn, dialect, quote, table, key_columns, batch, target_exists)
+                            stage_columns = ", ".join(quote(col) for col in batch.columns)
+                            conn.execute(text(
+                                f"CREATE TEMPORARY TABLE {quote(stage)} AS "
+                                f"SELECT {stage_columns} FROM {quote(table)} WHERE 1 = 0"
+                            ))
+                            stage_ready = True
+                        _load_stage(conn, dialect, quote, stage, batch)
+                        sql = _merge_sql(dialect, quote, table, quote(stage), batch.columns.tolist(), key_columns)
+                        result = conn.execute(text(sql))
+                        changed += max(0, result.rowcount or 0)
+                    batches += 1
+            finally:
+                with conn.begin():
+                    _drop_temp_table(conn, dialect, quote, stage)
+                if previous:
+                    _set_sqlite_pragmas(conn, previous)
+    except Exception as e:
+        return None, f"Merge error: {e}"
+    finally:
+        engine.dispose()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "changed": changed,
+        "duplicate_keys": duplicates,
+        "batches": batches,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else float(rows),
+        "method": f"merge ({dialect})",
+    }, None
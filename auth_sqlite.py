@@ -75,6 +75,18 @@ def init_db():
         )
     """)
 
+    # --- sql_watermarks: high-water marks for incremental SQL extraction ---
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sql_watermarks (
+            username TEXT,
+            source_key TEXT,
+            key_column TEXT,
+            high_water TEXT,
+            updated_at INTEGER,
+            PRIMARY KEY (username, source_key)
+        )
+    """)
+
     conn.commit()
     conn.close()
 
@@ -319,6 +331,50 @@ def load_logs(username):
     return {"uploads": {}}
 
 
+# =========================
+# SQL WATERMARKS (INCREMENTAL EXTRACTION)
+# =========================
+def get_watermark(username, source_key):
+    """
+    Return the stored high-water mark (int/float/str) for a source, or None.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT high_water FROM sql_watermarks WHERE username=? AND source_key=?", (username, source_key))
+    row = c.fetchone()
+    conn.close()
+    if row and row[0] is not None:
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+    return None
+
+def save_watermark(username, source_key, key_column, value):
+    """
+    Store the high-water mark for a source (JSON-encoded so ints stay ints).
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "INSERT OR REPLACE INTO sql_watermarks (username, source_key, key_column, high_water, updated_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (username, source_key, key_column, json.dumps(value), int(time.time())),
+    )
+    conn.commit()
+    conn.close()
+
+def reset_watermark(username, source_key):
+    """
+    Forget the high-water mark so the next run is a full load.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM sql_watermarks WHERE username=? AND source_key=?", (username, source_key))
+    conn.commit()
+    conn.close()
+
+
 # =========================
 # OPTIONAL: ADMIN / UTIL
 # =========================
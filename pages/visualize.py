@@ -1,8 +1,10 @@
 import streamlit as st
-import io
 from Back_End import csv_processor2
 from Back_End import process
 import base64
+import os
+import time
+import pandas as pd
 
 # ---- PAGE CONFIG ----
 st.set_page_config(
@@ -90,19 +92,233 @@ uploaded_file_analizer = st.file_uploader("Choose a CSV file", type=["csv"])
 st.markdown("⚠️ **Note:** For best performance, please upload smaller CSV files.")
 st.markdown("⚠️ **Note:** For best performance, please upload **Cleaned CSV files**.")
 
+with st.expander("⚙️ Report Options"):
+    render_workers = st.slider(
+        "Chart rendering workers",
+        min_value=1,
+        max_value=csv_processor2.MAX_RENDER_WORKERS,
+        value=csv_processor2.default_render_workers(),
+        help="Charts are rendered in parallel worker processes. 1 renders everything in the app process."
+    )
+    corr_float32 = st.checkbox(
+        "Single-precision correlations",
+        help="Computes the correlation matrix in float32: half the memory on very wide datasets."
+    )
+    use_cache = st.checkbox(
+        "Reuse cached reports",
+        value=True,
+        help="Reports and charts are cached on disk by file contents, so re-running on the same or a slightly changed file is fast."
+    )
+    output_modes = dict(csv_processor2.OUTPUT_MODES)
+    if not csv_processor2.HAS_SVGLIB:
+        output_modes.pop("vector")
+        st.caption("Vector output needs the optional `svglib` package.")
+    output_mode = st.selectbox(
+        "Chart output",
+        options=list(output_modes),
+        format_func=output_modes.get,
+        help="Vector charts stay sharp at any zoom and are usually the smallest; compressed rasters trade quality for size."
+    )
+    jpeg_quality = csv_processor2.DEFAULT_JPEG_QUALITY
+    palette_colors = 0
+    if output_mode == "compressed":
+        use_palette = st.checkbox(
+            "Palette quantization (PNG)",
+            help="Reduce each chart to a small color palette instead of JPEG encoding. Keeps lines and text crisp."
+        )
+        if use_palette:
+            palette_colors = st.slider("Palette colors", min_value=8, max_value=256, value=64)
+        else:
+            jpeg_quality = st.slider("JPEG quality", min_value=10, max_value=95, value=csv_processor2.DEFAULT_JPEG_QUALITY)
+    budget_time, budget_pages = st.columns(2)
+    time_budget = budget_time.number_input(
+        "Time budget (seconds)", min_value=0, value=0, step=30,
+        help="0 = no limit. Otherwise the least informative per-column charts are skipped to fit."
+    ) or None
+    page_budget = budget_pages.number_input(
+        "Page budget", min_value=0, value=0, step=10,
+        help="0 = no limit. Otherwise the least informative per-column charts are skipped to fit."
+    ) or None
+    heatmap_block = st.selectbox(
+        "Wide heatmap columns",
+        options=list(csv_processor2.HEATMAP_BLOCK_RANKINGS),
+        format_func=csv_processor2.HEATMAP_BLOCK_RANKINGS.get,
+        help=f"Above {csv_processor2.HEATMAP_BLOCK_SIZE} numeric columns the report heatmap shows only this many, "
+             "ranked by this measure. The full matrix can be downloaded from the Explorer."
+    )
+
+def show_explorer(aggregates, sidecars):
+    """Interactive column explorer: every chart reads from the precomputed aggregates."""
+    column_types = aggregates["column_types"]
+    kinds = {"Numeric": "numeric", "Categorical": "categorical", "Text": "text", "Date/Time": "datetime"}
+    available = [label for label, key in kinds.items() if column_types[key]]
+    if not available:
+        st.info("No columns to explore.")
+        return
+
+    controls, chart = st.columns([1, 3])
+    with controls:
+        kind = kinds[st.radio("Column type", available, key="explorer_kind")]
+        column = st.selectbox("Column", column_types[kind], key=f"explorer_column_{kind}")
+        distinct, exact = aggregates["distinct"][column]
+        st.metric("Missing", f"{aggregates['missing_pct'][column]:.1f}%")
+        st.metric("Distinct values", f"{'' if exact else '~'}{distinct:,}")
+        if kind == "numeric" and column in aggregates["stats"]:
+            stats = aggregates["stats"][column]
+            st.caption(
+                f"Mean {stats['mean']:.4g} · Std {stats['std']:.4g} · "
+                f"Min {stats['min']:.4g} · Max {stats['max']:.4g}"
+            )
+
+    with chart:
+        if kind == "numeric":
+            if column in aggregates["histograms"]:
+                st.markdown(f"**Distribution of {column}**")
+                st.bar_chart(aggregates["histograms"][column], y="count")
+            else:
+                st.info("No values to plot.")
+            correlations = aggregates["correlation"][column].drop(column).dropna()
+            if not correlations.empty:
+                strongest = correlations.reindex(correlations.abs().sort_values(ascending=False).index[:10])
+                st.markdown(f"**Strongest correlations with {column}**")
+                st.bar_chart(strongest.rename("corr"), horizontal=True)
+        elif kind in ("categorical", "text"):
+            st.markdown(f"**Most frequent values in {column}**")
+            st.bar_chart(aggregates["top_counts"][column], y="count", horizontal=True)
+            if column in aggregates["association"].columns:
+                associations = aggregates["association"][column].drop(column).dropna()
+                if not associations.empty:
+                    st.markdown(f"**Strongest associations with {column}** (Cramér's V)")
+                    st.bar_chart(associations.nlargest(10).rename("cramers_v"), horizontal=True)
+        else:
+            st.markdown(f"**Records per {aggregates['time_granularity'][column]} in {column}**")
+            st.bar_chart(aggregates["time_counts"][column], y="count")
+
+    correlation = aggregates["correlation"]
+    if len(correlation.columns) > 1:
+        with st.expander("Correlation matrix"):
+            if len(correlation.columns) <= 50:
+                st.dataframe(correlation.style.background_gradient(cmap="coolwarm", vmin=-1, vmax=1).format("{:.2f}"))
+            else:
+                st.caption(f"{len(correlation.columns)} numeric columns: download the full matrix below.")
+            csv_col, npz_col = st.columns(2)
+            with csv_col:
+                st.download_button("Download as CSV", data=sidecars["csv"],
+                                   file_name="correlation_matrix.csv", mime="text/csv", on_click="ignore")
+            with npz_col:
+                st.download_button("Download as NPZ", data=sidecars["npz"],
+                                   file_name="correlation_matrix.npz", mime="application/octet-stream",
+                                   on_click="ignore", help="float32 matrix ('corr') and column names ('columns'), "
+                                                           "load with numpy.load.")
+
+
 if uploaded_file_analizer:
-    with st.spinner("Processing... ⏳"):
-        processed_output = csv_processor2.process_file(uploaded_file_analizer)
-
-    if isinstance(processed_output, io.BytesIO):
-        st.success("✅ Successfully processed!")
-
-        # --- Download button ---
-        st.download_button(
-            label="⬇️ Download PDF",
-            data=processed_output.getvalue(),
-            file_name="simple_pdf.pdf",
-            mime="application/pdf"
+    # One profiling pass per file; the report and the explorer both reuse it,
+    # so reruns (widget clicks, tab switches) never re-read the dataset
+    profile_key = (uploaded_file_analizer.file_id, corr_float32)
+    if st.session_state.get("viz_profile_key") != profile_key:
+        with st.spinner("Profiling dataset... ⏳"):
+            profile, profile_error = csv_processor2.profile_csv(uploaded_file_analizer, float32=corr_float32)
+        st.session_state["viz_profile_key"] = profile_key
+        st.session_state["viz_profile"] = (profile, profile_error)
+        aggregates = csv_processor2.explorer_aggregates(profile) if profile else None
+        st.session_state["viz_aggregates"] = aggregates
+        # Serialized once here: on 1000+ columns this takes seconds, too slow for every rerun
+        st.session_state["viz_sidecars"] = (
+            {fmt: csv_processor2.correlation_sidecar(aggregates["correlation"], fmt) for fmt in ("csv", "npz")}
+            if aggregates and len(aggregates["correlation"].columns) > 1 else None
+        )
+        st.session_state.pop("viz_report", None)
+    profile, profile_error = st.session_state["viz_profile"]
+    if profile_error:
+        st.error(f"❌ Error: {profile_error}")
+        st.stop()
+    coerced = profile.coerced_values()
+    if not coerced.empty:
+        st.warning(
+            f"⚠️ {coerced.sum():,} values did not match their column's detected type (from the first rows) "
+            f"and are counted as missing: " + ", ".join(f"{col} ({count:,})" for col, count in coerced.items())
         )
-    else:
-        st.error(f"❌ Error: {processed_output}")
+
+    report_tab, explorer_tab = st.tabs(["📄 PDF Report", "🔎 Explorer"])
+
+    with report_tab:
+        report_key = (profile_key, use_cache, output_mode, jpeg_quality, palette_colors, time_budget, page_budget,
+                      heatmap_block)
+        report = st.session_state.get("viz_report")
+        if report is None or report[0] != report_key:
+            # Sections are offered for download as soon as each one is ready
+            with st.status("Processing... ⏳", expanded=True) as report_status:
+                def show_section(title, section_pdf):
+                    st.download_button(
+                        label=f"⬇️ {title}",
+                        data=section_pdf,
+                        file_name=f"{title.lower().replace('/', '_').replace(' ', '_')}.pdf",
+                        mime="application/pdf",
+                        key=f"section_{title}",
+                        on_click="ignore"
+                    )
+
+                plans = []
+                start = time.perf_counter()
+                processed_output = csv_processor2.process_file(
+                    uploaded_file_analizer, workers=render_workers, corr_float32=corr_float32,
+                    use_cache=use_cache, output_mode=output_mode, jpeg_quality=jpeg_quality,
+                    palette_colors=palette_colors, on_section=show_section, profile=profile,
+                    time_budget=time_budget, page_budget=page_budget, on_plan=plans.append,
+                    heatmap_block=heatmap_block
+                )
+                elapsed = time.perf_counter() - start
+                report_ok = not isinstance(processed_output, tuple)
+                report_status.update(
+                    label="Report sections" if report_ok else "Processing failed",
+                    state="complete" if report_ok else "error",
+                    expanded=False
+                )
+            st.session_state["viz_report"] = (report_key, processed_output, elapsed, plans[0] if plans else None)
+        _, processed_output, elapsed, plan = st.session_state["viz_report"]
+
+        if not isinstance(processed_output, tuple):
+            st.success("✅ Successfully processed!")
+            size_mb = processed_output.seek(0, os.SEEK_END) / 1e6
+            st.caption(f"{output_modes[output_mode]}: {size_mb:.2f} MB in {elapsed:.1f} s")
+            if plan and plan.get("budget_exceeded"):
+                st.warning(
+                    f"⚠️ The budget cannot be met: the sections that are always included (summary, heatmaps, "
+                    f"pair plots) already take about {plan['estimated_pages']} pages and "
+                    f"{plan['estimated_seconds']} s, so no per-column charts were kept. Raise the budget to get them."
+                )
+            if plan and plan["skipped"]:
+                with st.expander(f"⏭️ {len(plan['skipped'])} charts skipped to fit the budget"):
+                    st.caption(
+                        f"Estimated build: {plan['estimated_seconds']} s, {plan['estimated_pages']} pages. "
+                        "Columns are ranked by variance, completeness and correlation strength."
+                    )
+                    st.dataframe(
+                        pd.DataFrame(plan["skipped"], columns=["section", "column", "informativeness"]),
+                        hide_index=True
+                    )
+
+            if st.button("📏 Compare output modes", help="Builds the report once per output mode (no cache) and reports size and time."):
+                with st.spinner("Building the report in every output mode... ⏳"):
+                    comparison = csv_processor2.benchmark_output_modes(
+                        uploaded_file_analizer, workers=render_workers, corr_float32=corr_float32
+                    )
+                st.dataframe(comparison, hide_index=True)
+
+            def read_report(report=processed_output):
+                report.seek(0)
+                return report.read()
+
+            # --- Download button --- (read only when clicked; the report may be spooled to disk)
+            st.download_button(
+                label="⬇️ Download PDF",
+                data=read_report,
+                file_name="simple_pdf.pdf",
+                mime="application/pdf"
+            )
+        else:
+            st.error(f"❌ Error: {processed_output}")
+
+    with explorer_tab:
+        show_explorer(st.session_state["viz_aggregates"], st.session_state["viz_sidecars"])